@@ -0,0 +1,40 @@
+# contains_bad_word on clean messages (the common case, and the worst one for the old
+# loop): one substring scan per listed word against one pass of the automaton.
+import random
+import string
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot500
+
+MESSAGES = 1000
+rng = random.Random(42)
+
+
+def word():
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10)))
+
+
+def old_contains_bad_word(words, text):
+    low = text.lower()
+    for w in words:
+        if w in low:
+            return w
+    return None
+
+
+messages = [" ".join(rng.choice(["salom", "do'stlar", "bugun", "guruhda", "yangilik", "bor", "ertaga", "uchrashamiz"])
+                     for _ in range(15)) for _ in range(MESSAGES)]
+
+for n in sizes([10, 1000, 50000]):
+    words = {word() for _ in range(n)} - {"salom"}
+    with Timer() as build:
+        matcher = bot500.BadWordMatcher(words)
+    with Timer() as old:
+        old_hits = sum(old_contains_bad_word(words, m) is not None for m in messages)
+    with Timer() as new:
+        new_hits = sum(matcher.search(m) is not None for m in messages)
+    print(f"{len(words):>6} words: loop {old.seconds / MESSAGES * 1e6:9.1f} us/msg   "
+          f"automaton {new.seconds / MESSAGES * 1e6:6.1f} us/msg   build {build.seconds * 1000:7.1f} ms   "
+          f"hits {old_hits}/{new_hits}")
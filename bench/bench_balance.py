@@ -0,0 +1,70 @@
+# Concurrent balance updates: N add_balance calls spread over THREADS threads and a
+# handful of users. The old read-modify-write (SELECT balance, then UPDATE to the
+# computed value) against the atomic conditional UPDATE plus ledger row. Reports
+# throughput and how far users.balance drifted from the sum of applied amounts.
+import logging
+import random
+import threading
+
+from common import Timer, report, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+THREADS = 16
+USERS = 5
+AMOUNTS = (50, 20, 10, -10, -30, -60)
+
+
+def old_add_balance(user_id, amount):
+    with bot.db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,))
+        new_balance = c.fetchone()[0] + amount
+        if new_balance < 0:
+            raise ValueError("Balans salbiy bo'lib qolishi mumkin emas")
+        c.execute("UPDATE users SET balance = ? WHERE user_id = ?", (new_balance, user_id))
+        conn.commit()
+
+
+def new_add_balance(user_id, amount):
+    bot.add_balance(user_id, amount, "bench")
+
+
+def run(add, n):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM balance_ledger")
+        conn.execute("UPDATE users SET balance = 0")
+        conn.commit()
+    applied = [0] * THREADS
+
+    def worker(t):
+        rng = random.Random(t)
+        for _ in range(n // THREADS):
+            amount = rng.choice(AMOUNTS)
+            try:
+                add(rng.randint(1, USERS), amount)
+                applied[t] += amount
+            except ValueError:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    with Timer() as timer:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    with bot.db_connection() as conn:
+        total = conn.execute("SELECT SUM(balance) FROM users").fetchone()[0]
+    return timer.seconds, total - sum(applied)
+
+
+logging.disable(logging.INFO)  # the old path did not log per call either
+bot.init_db()
+for uid in range(1, USERS + 1):
+    bot.add_user(uid, f"user{uid}")
+for n in sizes([10000, 100000]):
+    for label, add in (("read-modify-write", old_add_balance), ("atomic update + ledger", new_add_balance)):
+        seconds, drift = run(add, n)
+        report(f"{label} ({THREADS} threads)", n, seconds, "ops")
+        print(f"{'':<40} balance drift vs applied amounts: {drift:+d}")
@@ -0,0 +1,53 @@
+# Callback dispatch: the old callbacks_router if-chain (== and startswith checks in
+# source order, so late buttons pay for every earlier check) against
+# CallbackRouter.resolve() over bot.py's real routes. The chain is rebuilt from the
+# registered routes, exact keys first and then prefixes, like the old handler.
+import random
+
+from common import Timer, report, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+
+def prefixes(node, path=""):
+    for ch, child in node.items():
+        if ch is None:
+            yield path, child
+        else:
+            yield from prefixes(child, path + ch)
+
+
+def if_chain(checks):
+    def resolve(data):
+        for kind, key, route in checks:
+            if kind == "exact" and data == key:
+                return route, ""
+            if kind == "prefix" and data.startswith(key):
+                return route, data[len(key):]
+        return None, data
+    return resolve
+
+
+router = bot.callbacks
+exact = [("exact", key, route) for key, route in router._exact.items()]
+prefixed = sorted(prefixes(router._trie), key=lambda kv: -len(kv[0]))  # longest first, as the chain had to
+chain = if_chain(exact + [("prefix", key, route) for key, route in prefixed])
+
+samples = list(router._exact) + [f"{key}{n}" for key, _ in prefixed for n in (1, 12345)]
+print(f"{len(exact)} exact routes, {len(prefixed)} prefix routes, {len(samples)} distinct callbacks")
+for sample in samples:
+    assert chain(sample)[0] is router.resolve(sample)[0], sample
+
+for n in sizes([100000, 1000000]):
+    data = [random.choice(samples) for _ in range(n)]
+    last = [f"{prefixed[-1][0]}{i}" for i in range(n)]  # worst case for the chain: checked last
+    for label, stream in (("mixed", data), ("last in chain", last)):
+        with Timer() as t:
+            for d in stream:
+                chain(d)
+        report(f"if-chain, {label}", n, t.seconds, "calls")
+        with Timer() as t:
+            for d in stream:
+                router.resolve(d)
+        report(f"router.resolve, {label}", n, t.seconds, "calls")
@@ -0,0 +1,47 @@
+# Batch Fernet throughput at N values: one encrypt_data/decrypt_data call per row
+# (the old path) against CryptoPool's encrypt_many/decrypt_many, which run inline
+# below CRYPTO_PARALLEL_THRESHOLD and on spawned worker processes above it.
+# Decryption is measured cold (cache bypassed) and warm (every token cached).
+import os
+
+from common import Timer, report, setup_workdir, sizes
+
+
+def main():
+    setup_workdir()
+    import bot
+    from crypto_pool import CryptoPool
+
+    print(f"{os.cpu_count()} CPU(s), workers={bot.CRYPTO_WORKERS or os.cpu_count()}, "
+          f"threshold={bot.CRYPTO_PARALLEL_THRESHOLD}, chunk={bot.CRYPTO_CHUNK_SIZE}")
+    for n in sizes([10000, 100000, 1000000]):
+        values = [f"+99890{i:07d}" for i in range(n)]
+        pool = CryptoPool(bot.ENCRYPTION_KEY, workers=bot.CRYPTO_WORKERS, parallel_threshold=bot.CRYPTO_PARALLEL_THRESHOLD,
+                          chunk_size=bot.CRYPTO_CHUNK_SIZE, cache_size=n)
+        pool.encrypt_many(values[:bot.CRYPTO_PARALLEL_THRESHOLD])  # start the workers outside the timings
+
+        with Timer() as t:
+            tokens = [bot.encrypt_data(v) for v in values]
+        report(f"encrypt_data per row ({n})", n, t.seconds, "rows")
+        with Timer() as t:
+            tokens = pool.encrypt_many(values)
+        report(f"encrypt_many ({n})", n, t.seconds, "rows")
+
+        with Timer() as t:
+            for token in tokens:
+                bot.cipher.decrypt(token.encode())
+        report(f"decrypt per row ({n})", n, t.seconds, "rows")
+        with Timer() as t:
+            plain = pool.decrypt_many(tokens, use_cache=False)
+        report(f"decrypt_many, cold ({n})", n, t.seconds, "rows")
+        assert plain == values
+        pool.decrypt_many(tokens)
+        with Timer() as t:
+            pool.decrypt_many(tokens)
+        report(f"decrypt_many, cached ({n})", n, t.seconds, "rows")
+        pool.shutdown()
+
+
+# Spawned workers re-run the main script as __mp_main__, so the work must sit behind the guard
+if __name__ == "__main__":
+    main()
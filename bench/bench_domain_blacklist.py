@@ -0,0 +1,44 @@
+# contains_blacklisted_domain: the old substring scan over every listed domain against
+# the host-suffix lookup, plus the time to load a feed file.
+import random
+import string
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot500
+
+MESSAGES = 1000
+rng = random.Random(5)
+
+
+def domain():
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(6, 12))) + rng.choice([".com", ".net", ".uz"])
+
+
+def old_contains_blacklisted_domain(domains, text):
+    for m in bot500.URL_REGEX.finditer(text):
+        url = m.group(0).lower()
+        for bad in domains:
+            if bad in url:
+                return bad
+    return None
+
+
+messages = [f"Batafsil: https://www.{domain()}/news/{i} ko'ring" for i in range(MESSAGES)]
+
+for n in sizes([1000, 100000]):
+    domains = [domain() for _ in range(n)]
+    with open("feed.txt", "w") as f:
+        f.writelines(f"0.0.0.0 {d}\n" for d in domains)
+    bot500.domain_blacklist = bot500.DomainBlacklist()
+    with Timer() as load:
+        bot500.load_domain_blacklist("feed.txt")
+    with Timer() as old:
+        for m in messages:
+            old_contains_blacklisted_domain(domains, m)
+    with Timer() as new:
+        for m in messages:
+            bot500.contains_blacklisted_domain(m)
+    print(f"{n:>7} domains: substring scan {old.seconds / MESSAGES * 1e6:9.1f} us/msg   "
+          f"suffix lookup {new.seconds / MESSAGES * 1e6:5.1f} us/msg   load {load.seconds * 1000:6.1f} ms")
@@ -0,0 +1,49 @@
+# Keyboard rendering per update for the admin main menu: building the pydantic
+# markup fresh and serializing it with the stock AiohttpSession (the old path)
+# against a KeyboardCache lookup sent through CachedMarkupSession, which adds the
+# pre-rendered JSON to the form. Reports time per update and peak allocation.
+import asyncio
+import tracemalloc
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+
+
+def stock_update():
+    markup = bot._build_main_menu(True)
+    return stock.build_form_data(bot.bot, SendMessage(chat_id=1, text="Asosiy menyu:", reply_markup=markup))
+
+
+def cached_update():
+    markup = bot.main_menu(True)
+    return cached.build_form_data(bot.bot, SendMessage(chat_id=1, text="Asosiy menyu:", reply_markup=markup))
+
+
+def peak_bytes(fn):
+    fn()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+async def make_sessions():
+    return AiohttpSession(), bot.bot.session
+
+
+stock, cached = asyncio.run(make_sessions())
+for n in sizes([10000, 100000]):
+    for label, fn in (("build only (fresh)", lambda: bot._build_main_menu(True)),
+                      ("build only (cached)", lambda: bot.main_menu(True)),
+                      ("build + form data (stock session)", stock_update),
+                      ("build + form data (cached session)", cached_update)):
+        with Timer() as t:
+            for _ in range(n):
+                fn()
+        print(f"{n:>7} updates  {label:<36} {t.seconds / n * 1e6:8.2f} µs/update  "
+              f"peak {peak_bytes(fn) / 1024:6.1f} KB")
@@ -0,0 +1,48 @@
+# Logging a burst of group messages: the old log_message (connect, INSERT, commit per
+# message, on the event loop) against MessageLogWriter's write-behind batches.
+import asyncio
+import sqlite3
+from datetime import datetime
+
+from common import Timer, report, setup_workdir, sizes
+
+setup_workdir()
+import bot500
+
+
+def old_log_message(user_id, username, chat_id, text, deleted=0, reason=None):
+    conn = sqlite3.connect(bot500.DB_FILE)
+    c = conn.cursor()
+    c.execute(
+        "INSERT INTO logs (ts, user_id, username, chat_id, message_text, deleted, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (datetime.utcnow().isoformat(), user_id, username, chat_id, text, deleted, reason),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def burst_old(n):
+    with Timer() as t:
+        for i in range(n):
+            old_log_message(i, "user", -100, f"message {i}")
+    report("log_message per row (handler time)", n, t.seconds, "msg")
+
+
+async def burst_new(n):
+    writer = bot500.MessageLogWriter()
+    writer.start()
+    with Timer() as total:
+        with Timer() as handler:
+            for i in range(n):
+                writer.log(i, "user", -100, f"message {i}")
+        await writer.stop()
+    report("MessageLogWriter (handler time)", n, handler.seconds, "msg")
+    report("MessageLogWriter (until written)", n, total.seconds, "msg")
+    assert writer.written == n and writer.dropped == 0
+
+
+bot500.init_db()
+for n in sizes([1000]):
+    asyncio.run(burst_old(n))
+    asyncio.run(burst_new(n))
+bot500.db_executor.shutdown()
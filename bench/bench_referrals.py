@@ -0,0 +1,68 @@
+# bench_referrals.py
+# Referral graph at N edges: the one-time backfill of referrals from users.referrer_id,
+# the recursive upline CTE at several depths, process_referral for new and repeated
+# referrals, and the leaderboard. Each user is referred by a random earlier user, so
+# the graph is a random recursive tree (depth ~ ln N).
+import random
+
+from common import Timer, report, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+QUERIES = 2000
+
+
+def populate(n):
+    rng = random.Random(n)
+    with bot.db_connection() as conn:
+        for table in ("users", "referrals", "balance_ledger", "balance_snapshots"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM counters WHERE name = 'referrals_backfilled'")
+        rows = ((uid, 0, 0, rng.randrange(1, uid) if uid > 1 else None, "2024-01-01T00:00:00")
+                for uid in range(1, n + 2))
+        conn.executemany("INSERT INTO users (user_id, referrals, balance, referrer_id, join_date) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+
+def upline(conn, user_id, levels):
+    return conn.execute(bot.REFERRAL_UPLINE_SQL, (user_id, levels)).fetchall()
+
+
+bot.init_db()
+for n in sizes([100000, 1000000]):
+    populate(n)
+    with Timer() as backfill:
+        bot.init_db()
+    with bot.db_connection() as conn:
+        edges = conn.execute("SELECT COUNT(*) FROM referrals").fetchone()[0]
+    assert edges == n
+    print(f"{n:>8} edges  one-time backfill {backfill.seconds * 1000:9.1f}ms")
+    with Timer() as again:
+        bot.init_db()
+    print(f"{n:>8} edges  init_db again, marker set {again.seconds * 1000:5.1f}ms")
+
+    rng = random.Random(1)
+    sample = [rng.randrange(2, n + 2) for _ in range(QUERIES)]
+    with bot.db_connection() as conn:
+        for levels in (len(bot.REFERRAL_REWARDS), 5, 64):
+            with Timer() as t:
+                walked = sum(len(upline(conn, uid, levels)) for uid in sample)
+            report(f"upline CTE, {levels} levels ({walked / QUERIES:.1f} avg)", QUERIES, t.seconds, "queries")
+
+    new_ids = range(n + 2, n + 2 + QUERIES)
+    for uid in new_ids:
+        bot.add_user(uid, None, referrer_id=rng.randrange(1, n + 2))
+    with bot.db_connection() as conn:
+        referrers = dict(conn.execute("SELECT user_id, referrer_id FROM users WHERE user_id >= ?", (n + 2,)))
+    with Timer() as t:
+        paid = sum(len(bot.process_referral(uid, referrers[uid])) for uid in new_ids)
+    report("process_referral, new user", QUERIES, t.seconds, "calls")
+    with Timer() as t:
+        repaid = sum(len(bot.process_referral(uid, referrers[uid])) for uid in new_ids)
+    report("process_referral, repeat", QUERIES, t.seconds, "calls")
+    assert paid >= QUERIES and repaid == 0
+
+    with Timer() as t:
+        top = bot.referral_leaderboard()
+    print(f"{n:>8} edges  leaderboard (top {len(top)}) {t.seconds * 1000:9.1f}ms")
@@ -0,0 +1,64 @@
+# /stats at N users: the old get_stats() that pulled every join_date into Python
+# against the counter-based one. Users are spread over ~3 years of join dates;
+# the one-time backfill of user_daily_counts is timed separately.
+import random
+from datetime import datetime, timedelta
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+DAYS = 1000
+
+
+def old_get_stats(conn):
+    c = conn.cursor()
+    c.execute("SELECT COUNT(*) as total, SUM(CASE WHEN activity_level > 0 THEN 1 ELSE 0 END) as active FROM users")
+    result = c.fetchone()
+    c.execute("SELECT join_date FROM users ORDER BY join_date")
+    dates = [row[0].split('T')[0] for row in c.fetchall()]
+    growth = {}
+    for date in dates:
+        growth[date] = growth.get(date, 0) + 1
+    return {"total_users": result[0], "active_users": result[1], "growth": growth}
+
+
+def populate(n):
+    start = datetime(2023, 1, 1)
+    rng = random.Random(n)
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM user_daily_counts")
+        rows = (
+            (uid, (start + timedelta(seconds=rng.randrange(DAYS * 86400))).isoformat(), rng.randrange(3))
+            for uid in range(1, n + 1)
+        )
+        conn.executemany("INSERT INTO users (user_id, join_date, activity_level) VALUES (?, ?, ?)", rows)
+        conn.commit()
+
+
+bot.init_db()
+for n in sizes([10000, 100000, 1000000]):
+    populate(n)
+    with Timer() as backfill:
+        bot.init_db()
+    with Timer() as old:
+        with bot.db_connection() as conn:
+            expected = old_get_stats(conn)
+    with Timer() as new:
+        stats = bot.get_stats()
+    assert stats["total_users"] == expected["total_users"] == n
+    assert stats["active_users"] == expected["active_users"]
+    last = sorted(expected["growth"].items())[-bot.STATS_GROWTH_WINDOW:]
+    assert list(stats["growth"].items()) == last
+    for label, seconds in (
+        ("one-time backfill", backfill.seconds),
+        ("old get_stats (all join_dates)", old.seconds),
+        ("new get_stats (daily counters)", new.seconds),
+    ):
+        print(f"{n:>8} users  {label:<34} {seconds * 1000:9.1f}ms")
+    for bucket in ("week", "month"):
+        with Timer() as t:
+            bot.get_stats(bucket)
+        print(f"{n:>8} users  {f'new get_stats({bucket!r})':<34} {t.seconds * 1000:9.1f}ms")
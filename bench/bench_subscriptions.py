@@ -0,0 +1,63 @@
+# Mandatory-channel check against a mocked Bot whose get_chat_member takes LATENCY
+# seconds: the old one-call-at-a-time loop, check_subscriptions() with a cold
+# SubscriptionCache, and the same user checking again while the cache is warm.
+import asyncio
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+LATENCY = 0.1
+
+
+class FakeMember:
+    status = "member"
+
+
+class FakeBot:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return FakeMember()
+
+
+async def sequential(fake, user_id, channels):
+    # the loop the subscribe callback used before check_subscriptions()
+    results = {}
+    for ch in channels:
+        try:
+            member = await fake.get_chat_member(chat_id=ch, user_id=user_id)
+            results[ch] = member.status in ["member", "administrator", "creator"]
+        except Exception:
+            results[ch] = False
+    return results
+
+
+async def run(n):
+    channels = [f"@channel{i}" for i in range(n)]
+    bot.subscription_cache = bot.SubscriptionCache()
+    rows = []
+    fake = FakeBot(LATENCY)
+    with Timer() as t:
+        await sequential(fake, 1, channels)
+    rows.append(("sequential", t.seconds, fake.calls))
+    fake = FakeBot(LATENCY)
+    with Timer() as t:
+        await bot.check_subscriptions(1, channels, fake)
+    rows.append(("concurrent, cold cache", t.seconds, fake.calls))
+    fake = FakeBot(LATENCY)
+    with Timer() as t:
+        await bot.check_subscriptions(1, channels, fake)
+    rows.append(("concurrent, warm cache", t.seconds, fake.calls))
+    return rows
+
+
+print(f"get_chat_member latency {LATENCY * 1000:.0f}ms, concurrency {bot.SUBSCRIPTION_CHECK_CONCURRENCY}")
+for n in sizes([5, 21, 50]):
+    for label, seconds, calls in asyncio.run(run(n)):
+        print(f"{n:>4} channels  {label:<24} {seconds * 1000:9.1f}ms  {calls:>4} API calls")
@@ -0,0 +1,65 @@
+# Admin user listing at N encrypted users: the old path (filter_users() fetched and
+# decrypted every row, then the handler showed 30) against list_users_page(), which
+# fetches and decrypts one keyset page. Reports latency and peak Python memory.
+import itertools
+import tracemalloc
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot
+
+CIPHERTEXTS = 1000  # distinct encrypted values; decrypting a reused token costs the same
+
+
+def old_filter_users(conn):
+    users = conn.execute("SELECT * FROM users WHERE 1=1").fetchall()
+    decrypted_users = []
+    for user in users:
+        decrypted_user = list(user)
+        decrypted_user[1] = bot.decrypt_data(user[1]) if user[1] else None
+        decrypted_user[2] = bot.decrypt_data(user[2]) if user[2] else None
+        decrypted_users.append(decrypted_user)
+    return decrypted_users
+
+
+def populate(n):
+    names = [bot.encrypt_data(f"user{i}") for i in range(CIPHERTEXTS)]
+    phones = [bot.encrypt_data(f"+99890{i:07d}") for i in range(CIPHERTEXTS)]
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users")
+        rows = zip(range(1, n + 1), itertools.cycle(names), itertools.cycle(phones))
+        conn.executemany("INSERT INTO users (user_id, username, phone, balance) VALUES (?, ?, ?, 0)", rows)
+        conn.commit()
+
+
+def measure(fn):
+    tracemalloc.start()
+    with Timer() as t:
+        result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, t.seconds, peak
+
+
+bot.init_db()
+for n in sizes([10000, 100000, 1000000]):
+    populate(n)
+
+    def old():
+        with bot.db_connection() as conn:
+            return old_filter_users(conn)[:bot.USERS_PAGE_SIZE]
+
+    def first_page():
+        return bot.list_users_page()
+
+    def deep_page():
+        return bot.list_users_page(after_id=n // 2)
+
+    def previous_page():
+        return bot.list_users_page(before_id=n // 2)
+
+    for label, fn in (("old: decrypt all, show 30", old), ("first page", first_page),
+                      ("middle page (after_id)", deep_page), ("middle page (before_id)", previous_page)):
+        _, seconds, peak = measure(fn)
+        print(f"{n:>8} users  {label:<28} {seconds * 1000:10.1f}ms  peak {peak / 1024:10.0f}KB")
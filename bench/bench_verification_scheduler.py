@@ -0,0 +1,64 @@
+# Pending verifications: one sleeping asyncio task per joined user (the old
+# verification_timeout) against VerificationScheduler's single heap. Measures the
+# memory held while users are pending, the time to schedule them, and the time to
+# cancel them all (every user verifies).
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from common import Timer, setup_workdir, sizes
+
+setup_workdir()
+import bot500
+
+TIMEOUT = 3600
+
+
+async def per_task(n):
+    async def verification_timeout(uid):
+        try:
+            await asyncio.sleep(TIMEOUT)
+        except asyncio.CancelledError:
+            return
+
+    tracemalloc.start()
+    with Timer() as schedule:
+        tasks = {uid: asyncio.create_task(verification_timeout(uid)) for uid in range(n)}
+        await asyncio.sleep(0)  # let every task reach its sleep
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    with Timer() as cancel:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values())
+    return schedule.seconds, cancel.seconds, memory
+
+
+async def heap(n):
+    async def on_expire(user_ids):
+        pass
+
+    scheduler = bot500.VerificationScheduler(on_expire)
+    scheduler.start()
+    deadline = time.time() + TIMEOUT
+    tracemalloc.start()
+    with Timer() as schedule:
+        for uid in range(n):
+            scheduler.schedule(uid, deadline + uid * 0.001)
+        await asyncio.sleep(0)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    with Timer() as cancel:
+        for uid in range(n):
+            scheduler.cancel(uid)
+    await scheduler.stop()
+    return schedule.seconds, cancel.seconds, memory
+
+
+for n in sizes([1000, 10000, 100000]):
+    for name, fn in (("task per user", per_task), ("heap scheduler", heap)):
+        gc.collect()
+        schedule, cancel, memory = asyncio.run(fn(n))
+        print(f"{n:>7} pending  {name:<15} schedule {schedule:7.3f}s  cancel all {cancel:7.3f}s  "
+              f"memory {memory / 2**20:7.1f} MB")
@@ -0,0 +1,36 @@
+# common.py
+# Shared setup for the bench/ scripts. Run them from the repo root, e.g.
+#   python bench/bench_db_pool.py
+# Each script works in a fresh temporary directory, so the bots' key, database
+# and log files never touch the checkout.
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_workdir():
+    sys.path.insert(0, REPO_ROOT)
+    path = tempfile.mkdtemp(prefix="bench-")
+    os.chdir(path)
+    return path
+
+
+def sizes(default):
+    """Problem sizes from the command line (``bench_x.py 1000 10000``), else ``default``."""
+    return [int(a) for a in sys.argv[1:]] or list(default)
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+
+
+def report(label, n, seconds, unit="ops"):
+    print(f"{label:<40} {n:>9} {unit} in {seconds:8.3f}s  {n / seconds:>12,.0f} {unit}/s")
@@ -1,10 +1,15 @@
 # bot.py
 import asyncio
+import heapq
 import logging
+import os
 import re
-import sqlite3
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Optional
+from urllib.parse import urlsplit
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
@@ -15,6 +20,9 @@ from aiogram.types import (
     ReplyKeyboardMarkup,
 )
 
+from db_pool import get_pool, close_all_pools, DBExecutor
+from ratelimit import TokenBucket, call_with_retry
+
 # -----------------------
 # CONFIG - O'ZGARTIRING
 # -----------------------
@@ -29,9 +37,35 @@ LOG_FILE = "bot_security.log"
 # Bad words va blacklist domenlar — o'z ehtiyojingizga ko'ra to'ldiring
 BAD_WORDS = {"nojoya1", "nojoya2", "nojoya3"}
 BLACKLISTED_DOMAINS = {"badsite.com", "spam.example"}
+# Katta qora ro'yxat fayli (har qatorda bitta domen, hosts-fayl yoki "||domen^" formatlari ham bo'ladi)
+BLACKLIST_FILE = "blacklist.txt"
+# True bo'lsa so'z faqat alohida so'z sifatida topiladi ("nojoya1x" ichida emas)
+BAD_WORDS_WORD_BOUNDARIES = False
 
 # Verification timeout (sekundlarda) — foydalanuvchi shu muddat ichida verify qilmasa, kick qilinadi
 VERIFICATION_TIMEOUT = 10 * 60  # 10 daqiqa
+# Bot o'chiq paytida muddati o'tganlar fonda shu o'lchamdagi bo'laklarda ban qilinadi
+BAN_BACKLOG_CHUNK = 500
+
+# Muddati o'tgan foydalanuvchilarni ban qilish: sekundiga nechta so'rov, bir vaqtda nechta,
+# va adminga yagona xulosa necha soniyada bir yuboriladi
+BAN_RATE = 20
+BAN_CONCURRENCY = 5
+BAN_SUMMARY_WINDOW = 60
+
+# Admin loglari navbat orqali yuboriladi: oddiy xabarlar har ADMIN_LOG_FLUSH_INTERVAL soniyada
+# bitta xabarga jamlanadi, toifali hodisalar (link, nojo'ya so'z, ...) esa
+# ADMIN_LOG_COALESCE_WINDOW soniyada bir marta "37 ta ... " ko'rinishida yuboriladi
+ADMIN_LOG_FLUSH_INTERVAL = 2
+ADMIN_LOG_COALESCE_WINDOW = 60
+ADMIN_LOG_BUFFER = 1000  # navbatdagi oddiy xabarlar chegarasi, oshgani tashlab yuboriladi (hisoblanadi)
+ADMIN_LOG_RATE = 1  # adminga sekundiga nechta xabar
+
+# Xabar loglari navbat orqali partiyalab yoziladi: shuncha yozuv yig'ilganda yoki
+# shuncha soniya o'tganda (qaysi biri oldin bo'lsa) bitta tranzaksiyada saqlanadi
+LOG_BATCH_SIZE = 200
+LOG_FLUSH_INTERVAL = 1.0
+LOG_QUEUE_MAX = 10000  # navbat to'lsa yangi loglar tashlab yuboriladi (hisoblanadi)
 
 # -----------------------
 # Logging
@@ -46,107 +80,229 @@ logger = logging.getLogger(__name__)
 # -----------------------
 # DB helpers (sync sqlite)
 # -----------------------
+db_pool = get_pool(DB_FILE)
+db_executor = DBExecutor()
+
+
+@contextmanager
+def db_connection():
+    with db_pool.connection() as conn:
+        yield conn
+
+
 def init_db():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            telefon TEXT,
+            ism TEXT,
+            familiya TEXT,
+            yosh INTEGER,
+            join_date TEXT,
+            verified INTEGER DEFAULT 0,
+            verified_at TEXT
+        )
         """
-    CREATE TABLE IF NOT EXISTS users (
-        user_id INTEGER PRIMARY KEY,
-        username TEXT,
-        telefon TEXT,
-        ism TEXT,
-        familiya TEXT,
-        yosh INTEGER,
-        join_date TEXT,
-        verified INTEGER DEFAULT 0,
-        verified_at TEXT
-    )
-    """
-    )
-    c.execute(
+        )
+        c.execute(
+            """
+        CREATE TABLE IF NOT EXISTS logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT,
+            user_id INTEGER,
+            username TEXT,
+            chat_id INTEGER,
+            message_text TEXT,
+            deleted INTEGER DEFAULT 0,
+            reason TEXT
+        )
         """
-    CREATE TABLE IF NOT EXISTS logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ts TEXT,
-        user_id INTEGER,
-        username TEXT,
-        chat_id INTEGER,
-        message_text TEXT,
-        deleted INTEGER DEFAULT 0,
-        reason TEXT
-    )
-    """
-    )
-    conn.commit()
-    conn.close()
+        )
+        # Restart-safe copy of pending_verification / pending_field: a row lives while
+        # the user has a verification deadline and/or a field being collected
+        c.execute(
+            """
+        CREATE TABLE IF NOT EXISTS pending_state (
+            user_id INTEGER PRIMARY KEY,
+            group_id INTEGER,
+            chat_title TEXT,
+            joined_at TEXT,
+            deadline REAL,
+            has_phone INTEGER DEFAULT 0,
+            field TEXT
+        )
+        """
+        )
+        c.execute("CREATE INDEX IF NOT EXISTS idx_pending_deadline ON pending_state(deadline) WHERE deadline IS NOT NULL")
+        conn.commit()
     logger.info("Initialized DB")
 
 
 def save_contact(user_id: int, username: Optional[str], phone: Optional[str]):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        """
-    INSERT INTO users (user_id, username, telefon, join_date)
-    VALUES (?, ?, ?, ?)
-    ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, telefon=excluded.telefon
-    """,
-        (user_id, username, phone, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            """
+        INSERT INTO users (user_id, username, telefon, join_date)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, telefon=excluded.telefon
+        """,
+            (user_id, username, phone, datetime.utcnow().isoformat()),
+        )
+        conn.commit()
     logger.info(f"Saved contact for {user_id}")
 
 
 def update_user_field(user_id: int, field: str, value):
     if field not in {"ism", "familiya", "manzil", "username", "telefon", "yosh", "verified", "verified_at"}:
         return
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    if field == "yosh":
-        try:
-            value = int(value)
-        except Exception:
-            value = None
-    c.execute(f"UPDATE users SET {field} = ? WHERE user_id = ?", (value, user_id))
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        c = conn.cursor()
+        if field == "yosh":
+            try:
+                value = int(value)
+            except Exception:
+                value = None
+        c.execute(f"UPDATE users SET {field} = ? WHERE user_id = ?", (value, user_id))
+        conn.commit()
     logger.info(f"Updated {field} for {user_id}: {value}")
 
 
 def mark_verified(user_id: int):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "UPDATE users SET verified = 1, verified_at = ? WHERE user_id = ?",
-        (datetime.utcnow().isoformat(), user_id),
-    )
-    conn.commit()
-    conn.close()
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute(
+            "UPDATE users SET verified = 1, verified_at = ? WHERE user_id = ?",
+            (datetime.utcnow().isoformat(), user_id),
+        )
+        conn.commit()
     logger.info(f"Marked verified: {user_id}")
 
 
-def log_message(user_id: int, username: Optional[str], chat_id: int, text: str, deleted: int = 0, reason: Optional[str] = None):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO logs (ts, user_id, username, chat_id, message_text, deleted, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
-        (datetime.utcnow().isoformat(), user_id, username, chat_id, text, deleted, reason),
+def log_messages(rows: list):
+    # rows: (ts, user_id, username, chat_id, message_text, deleted, reason) — one transaction per batch
+    with db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO logs (ts, user_id, username, chat_id, message_text, deleted, reason) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+def get_user_phone(user_id: int) -> Optional[str]:
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT telefon FROM users WHERE user_id = ?", (user_id,))
+        row = c.fetchone()
+    return row[0] if row else None
+
+
+def get_verified_users(user_ids: list) -> set:
+    verified = set()
+    with db_connection() as conn:
+        for i in range(0, len(user_ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = user_ids[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT user_id FROM users WHERE verified = 1 AND user_id IN ({marks})", chunk)
+            verified.update(r[0] for r in rows)
+    return verified
+
+
+def save_pending_verification(user_id: int, group_id: int, chat_title: str, joined_at: str, deadline: float):
+    with db_connection() as conn:
+        conn.execute(
+            """
+        INSERT INTO pending_state (user_id, group_id, chat_title, joined_at, deadline, has_phone)
+        VALUES (?, ?, ?, ?, ?, 0)
+        ON CONFLICT(user_id) DO UPDATE SET group_id=excluded.group_id, chat_title=excluded.chat_title,
+            joined_at=excluded.joined_at, deadline=excluded.deadline, has_phone=0
+        """,
+            (user_id, group_id, chat_title, joined_at, deadline),
+        )
+        conn.commit()
+
+
+def set_pending_has_phone(user_id: int):
+    with db_connection() as conn:
+        conn.execute("UPDATE pending_state SET has_phone = 1 WHERE user_id = ?", (user_id,))
+        conn.commit()
+
+
+def _clear_pending(conn, user_ids: list):
+    params = [(uid,) for uid in user_ids]
+    conn.executemany(
+        "UPDATE pending_state SET group_id = NULL, chat_title = NULL, joined_at = NULL, deadline = NULL, has_phone = 0 WHERE user_id = ?",
+        params,
     )
-    conn.commit()
-    conn.close()
-    logger.debug(f"Logged msg from {user_id} in chat {chat_id} deleted={deleted} reason={reason}")
+    conn.executemany("DELETE FROM pending_state WHERE user_id = ? AND field IS NULL", params)
+
+
+def clear_pending_verifications(user_ids: list):
+    with db_connection() as conn:
+        _clear_pending(conn, user_ids)
+        conn.commit()
+
+
+def sweep_expired_pending(now: float) -> list:
+    """Startup sweep of deadlines that passed while the bot was down.
+
+    Users who verified in the meantime are cleared here in one transaction. The
+    rest are returned as (user_id, group_id) and stay in pending_state until
+    they are banned, so an interrupted backlog is picked up again next start.
+    """
+    with db_connection() as conn:
+        rows = conn.execute(
+            "SELECT p.user_id, p.group_id, COALESCE(u.verified, 0) FROM pending_state p LEFT JOIN users u ON u.user_id = p.user_id "
+            "WHERE p.deadline IS NOT NULL AND p.deadline <= ?",
+            (now,),
+        ).fetchall()
+        _clear_pending(conn, [uid for uid, _, verified in rows if verified])
+        conn.commit()
+    return [(uid, group_id) for uid, group_id, verified in rows if not verified]
+
+
+def set_pending_field(user_id: int, field: Optional[str]):
+    with db_connection() as conn:
+        if field:
+            conn.execute(
+                "INSERT INTO pending_state (user_id, field) VALUES (?, ?) ON CONFLICT(user_id) DO UPDATE SET field=excluded.field",
+                (user_id, field),
+            )
+        else:
+            conn.execute("UPDATE pending_state SET field = NULL WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM pending_state WHERE user_id = ? AND deadline IS NULL", (user_id,))
+        conn.commit()
+
+
+def load_pending_state(now: float) -> tuple:
+    """Verifications whose deadline is still ahead, and fields being collected."""
+    with db_connection() as conn:
+        verifications = conn.execute(
+            "SELECT user_id, group_id, chat_title, joined_at, deadline, has_phone FROM pending_state WHERE deadline > ? ORDER BY deadline",
+            (now,),
+        ).fetchall()
+        fields = conn.execute("SELECT user_id, field FROM pending_state WHERE field IS NOT NULL").fetchall()
+    return verifications, fields
+
+
+def get_recent_logs(limit: int = 100) -> list:
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT ts, user_id, username, chat_id, message_text, reason FROM logs ORDER BY id DESC LIMIT ?", (limit,))
+        return c.fetchall()
 
 
 def get_stats_text() -> str:
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM users")
-    total = c.fetchone()[0]
-    c.execute("SELECT user_id, username, ism, familiya, telefon, yosh, verified FROM users ORDER BY join_date DESC LIMIT 200")
-    rows = c.fetchall()
-    conn.close()
+    with db_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT COUNT(*) FROM users")
+        total = c.fetchone()[0]
+        c.execute("SELECT user_id, username, ism, familiya, telefon, yosh, verified FROM users ORDER BY join_date DESC LIMIT 200")
+        rows = c.fetchall()
     text = f"📊 Foydalanuvchilar soni: {total}\n\nRo'yxat (so'ngilar 200):\n"
     for r in rows:
         uid, uname, ism, fam, tel, yosh, ver = r
@@ -154,54 +310,690 @@ def get_stats_text() -> str:
     return text
 
 
+# Async versions of the helpers above — handlers await these so blocking sqlite
+# work runs on the DB thread instead of the event loop
+init_db_async = db_executor.wrap(init_db)
+save_contact_async = db_executor.wrap(save_contact)
+update_user_field_async = db_executor.wrap(update_user_field)
+mark_verified_async = db_executor.wrap(mark_verified)
+log_messages_async = db_executor.wrap(log_messages)
+get_user_phone_async = db_executor.wrap(get_user_phone)
+get_verified_users_async = db_executor.wrap(get_verified_users)
+save_pending_verification_async = db_executor.wrap(save_pending_verification)
+set_pending_has_phone_async = db_executor.wrap(set_pending_has_phone)
+clear_pending_verifications_async = db_executor.wrap(clear_pending_verifications)
+set_pending_field_async = db_executor.wrap(set_pending_field)
+load_pending_state_async = db_executor.wrap(load_pending_state)
+sweep_expired_pending_async = db_executor.wrap(sweep_expired_pending)
+get_recent_logs_async = db_executor.wrap(get_recent_logs)
+get_stats_text_async = db_executor.wrap(get_stats_text)
+
+
 # -----------------------
 # Utilities
 # -----------------------
 URL_REGEX = re.compile(r"(https?://[^\s]+|www\.[^\s]+)", re.IGNORECASE)
 
 
+# Look-alike characters folded before matching so "nоjoya1" (Cyrillic о),
+# "n0joya1" and Uzbek apostrophe variants (oʻ / o‘ / o') hit the same entry.
+# Every mapping is one char -> one char, so match offsets stay valid in the original text.
+CONFUSABLES = str.maketrans({
+    "а": "a", "е": "e", "ё": "e", "о": "o", "р": "p", "с": "c", "у": "y", "х": "x",
+    "к": "k", "і": "i", "ј": "j", "ѕ": "s",
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s",
+    "ʻ": "'", "ʼ": "'", "‘": "'", "’": "'", "`": "'",
+})
+
+
+class BadWordMatcher:
+    """Aho–Corasick automaton over the bad-word list.
+
+    Built once per word list; scanning a message is O(len(text) + matches)
+    regardless of how many words are in the list.
+    """
+
+    def __init__(self, words=(), word_boundaries: bool = False, normalize: bool = True):
+        self.word_boundaries = word_boundaries
+        self.normalize = normalize
+        self.words: frozenset = frozenset()
+        self.build(words)
+
+    def _fold(self, text: str) -> str:
+        low = text.lower()
+        if len(low) != len(text):
+            # a few characters (e.g. "İ") lower() to two chars — keep those as-is so offsets line up
+            low = "".join(c if len(c) == 1 else ch for ch in text for c in (ch.lower(),))
+        return low.translate(CONFUSABLES) if self.normalize else low
+
+    def build(self, words):
+        words = frozenset(w for w in words if w)
+        goto: list[dict] = [{}]
+        out: list[tuple] = [()]
+        seen = set()
+        for word in sorted(words):
+            key = self._fold(word)
+            if key in seen:
+                continue
+            seen.add(key)
+            node = 0
+            for ch in key:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += ((word, len(key)),)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+
+        self._goto, self._fail, self._out = goto, fail, out
+        self.words = words
+        logger.info(f"Bad word matcher built: {len(words)} words, {len(goto)} states")
+
+    @staticmethod
+    def _is_word_char(ch: str) -> bool:
+        return ch.isalnum() or ch in "_'"
+
+    def _iter_matches(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        folded = self._fold(text)
+        node = 0
+        for i, ch in enumerate(folded):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for word, length in out[node]:
+                start = i - length + 1
+                if self.word_boundaries and (
+                    (start > 0 and self._is_word_char(folded[start - 1]))
+                    or (i + 1 < len(folded) and self._is_word_char(folded[i + 1]))
+                ):
+                    continue
+                yield start, word
+
+    def find_all(self, text: str) -> list:
+        """Every match as (offset, word), offsets into the original text."""
+        return list(self._iter_matches(text))
+
+    def search(self, text: str) -> Optional[str]:
+        for _, word in self._iter_matches(text):
+            return word
+        return None
+
+
+bad_word_matcher = BadWordMatcher(BAD_WORDS, word_boundaries=BAD_WORDS_WORD_BOUNDARIES)
+
+
+def set_bad_words(words):
+    """Replace the bad-word list; the automaton is rebuilt only if the list actually changed."""
+    global BAD_WORDS
+    words = {w.strip() for w in words if w and w.strip()}
+    if frozenset(words) == bad_word_matcher.words:
+        return
+    BAD_WORDS = words
+    bad_word_matcher.build(words)
+
+
 def contains_bad_word(text: str) -> Optional[str]:
-    low = text.lower()
-    for w in BAD_WORDS:
-        if w in low:
-            return w
-    return None
+    return bad_word_matcher.search(text)
+
+
+def find_bad_words(text: str) -> list:
+    return bad_word_matcher.find_all(text)
+
+
+class DomainBlacklist:
+    """Hash-set of blacklisted domains with label-suffix lookup.
+
+    A host is blacklisted if it or any parent domain is in the set, so
+    "x.badsite.com" matches "badsite.com" but "notbadsite.com.example" does not.
+    Each lookup costs O(labels in host), independent of the blacklist size.
+    """
+
+    def __init__(self, domains=()):
+        self.domains: set = set()
+        self.update(domains)
+
+    @staticmethod
+    def normalize(domain: str) -> str:
+        return domain.strip().lower().rstrip(".")
+
+    def update(self, domains):
+        for d in domains:
+            d = self.normalize(d)
+            if d:
+                self.domains.add(d)
+
+    def match_host(self, host: str) -> Optional[str]:
+        labels = self.normalize(host).split(".")
+        for i in range(len(labels)):
+            suffix = ".".join(labels[i:])
+            if suffix in self.domains:
+                return suffix
+        return None
+
+    def __len__(self):
+        return len(self.domains)
+
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> list:
+    """Split text into chunks of at most ``limit`` chars, preferring line breaks."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+# Punctuation a URL picks up from the surrounding sentence: "(see badsite.com)," / "https://badsite.com!"
+HOST_LEADING_PUNCT = "([{<'\""
+HOST_TRAILING_PUNCT = ".,;:!?)]}>'\""
+
+
+def extract_host(url: str) -> Optional[str]:
+    url = url.strip().lstrip(HOST_LEADING_PUNCT).rstrip(HOST_TRAILING_PUNCT)
+    if not url.lower().startswith(("http://", "https://")):
+        url = "http://" + url
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    # "https://badsite.com!/x" leaves the "!" in the host itself
+    return host.lstrip(HOST_LEADING_PUNCT).rstrip(HOST_TRAILING_PUNCT) or None
+
+
+def parse_blacklist_line(line: str) -> Optional[str]:
+    # Accepts "domain", hosts-file "0.0.0.0 domain" and adblock "||domain^" lines
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    if line.startswith("||"):
+        line = line[2:].split("^", 1)[0]
+    parts = line.split()
+    domain = parts[-1] if parts else ""
+    if domain in ("localhost", "0.0.0.0", "127.0.0.1"):
+        return None
+    return domain
+
+
+def load_domain_blacklist(path: str) -> int:
+    """Add every domain from a blacklist feed file; returns how many lines were loaded."""
+    count = 0
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        batch = []
+        for line in f:
+            domain = parse_blacklist_line(line)
+            if domain:
+                batch.append(domain)
+            if len(batch) >= 10000:
+                domain_blacklist.update(batch)
+                count += len(batch)
+                batch = []
+        domain_blacklist.update(batch)
+        count += len(batch)
+    logger.info(f"Loaded {count} blacklisted domains from {path} ({len(domain_blacklist)} total)")
+    return count
+
+
+domain_blacklist = DomainBlacklist(BLACKLISTED_DOMAINS)
 
 
 def contains_blacklisted_domain(text: str) -> Optional[str]:
     for m in URL_REGEX.finditer(text):
-        url = m.group(0).lower()
-        for bad in BLACKLISTED_DOMAINS:
-            if bad in url:
-                return bad
+        host = extract_host(m.group(0))
+        if not host:
+            continue
+        bad = domain_blacklist.match_host(host)
+        if bad:
+            return bad
     return None
 
 
 # -----------------------
 # In-memory structures
 # -----------------------
-# pending_verification: user_id -> {chat_id, group_id, expires_at, task (asyncio.Task)}
+# Both are mirrored in the pending_state table so they survive a restart (see restore_pending_state)
+# pending_verification: user_id -> {group_id, chat_title, joined_at, deadline, has_phone}
 pending_verification: dict[int, dict] = {}
 
 # pending_field for interactive collection: user_id -> field name (ism/familiya/yosh)
 pending_field: dict[int, str] = {}
 
+# -----------------------
+# Write-behind message log
+# -----------------------
+class MessageLogWriter:
+    """Queues log rows and writes them in batches from a background task.
+
+    Handlers call log() which never blocks; rows are flushed with one
+    executemany/commit when LOG_BATCH_SIZE rows are buffered or the oldest one
+    is LOG_FLUSH_INTERVAL seconds old. stop() drains everything still queued.
+    """
+
+    def __init__(self, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL, max_queue: int = LOG_QUEUE_MAX):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.written = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    def log(self, user_id: int, username: Optional[str], chat_id: int, text: str, deleted: int = 0, reason: Optional[str] = None):
+        row = (datetime.utcnow().isoformat(), user_id, username, chat_id, text, deleted, reason)
+        if self._queue is None:
+            # writer not running (startup/shutdown): hand the row to the DB thread, never write inline
+            try:
+                db_executor.submit(log_messages, [row])
+            except RuntimeError:  # DB executor already shut down
+                self._drop()
+            return
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._drop()
+
+    def _drop(self):
+        self.dropped += 1
+        if self.dropped % 1000 == 1:
+            logger.warning(f"Message log row dropped ({self.dropped} so far)")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        try:
+            await log_messages_async(batch)
+            self.written += len(batch)
+            logger.debug(f"Flushed {len(batch)} log rows")
+        except Exception:
+            logger.exception(f"Failed to write {len(batch)} log rows")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)  # sentinel: everything queued before it gets written
+        await self._task
+        self._task = None
+        self._queue = None
+        logger.info(f"Message log writer stopped: written={self.written} dropped={self.dropped}")
+
+
+message_log = MessageLogWriter()
+
+# -----------------------
+# Verification deadlines
+# -----------------------
+class VerificationScheduler:
+    """Single background task that fires verification deadlines.
+
+    Deadlines live in a min-heap of (deadline, user_id) plus a dict holding each
+    user's current deadline. cancel() only drops the dict entry (O(1)); stale heap
+    entries are skipped when popped. Everything due at the same moment is handed
+    to on_expire as one list.
+    """
+
+    def __init__(self, on_expire, max_batch: int = 1000):
+        self.on_expire = on_expire
+        self.max_batch = max_batch
+        self._heap: list = []
+        self._deadlines: dict[int, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def schedule(self, user_id: int, deadline: float):
+        """Set (or reset) a user's deadline, as a time.time() timestamp."""
+        self._deadlines[user_id] = deadline
+        heapq.heappush(self._heap, (deadline, user_id))
+        if len(self._heap) > 2 * len(self._deadlines) + 1024:
+            self._compact()
+        if self._wakeup and self._heap[0][1] == user_id:
+            self._wakeup.set()  # new earliest deadline
+
+    def cancel(self, user_id: int):
+        self._deadlines.pop(user_id, None)
+
+    def _compact(self):
+        self._heap = [(d, uid) for uid, d in self._deadlines.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        heap, deadlines = self._heap, self._deadlines
+        while heap and heap[0][0] <= now and len(due) < self.max_batch:
+            deadline, uid = heapq.heappop(heap)
+            if deadlines.get(uid) == deadline:
+                del deadlines[uid]
+                due.append(uid)
+        return due
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    await self.on_expire(due)
+                except Exception:
+                    logger.exception("verification expiry error")
+                continue
+            self._wakeup.clear()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
 # -----------------------
 # Bot setup
 # -----------------------
 bot = Bot(token=TELEGRAM_TOKEN)
 dp = Dispatcher()
 
-# Helper to send admin log (via numeric id if set, otherwise via @username)
-async def send_admin_log(text: str):
-    try:
-        if ADMIN_CHAT_ID:
-            await bot.send_message(ADMIN_CHAT_ID, text)
-        else:
-            # use username
-            await bot.send_message(f"@{ADMIN_USERNAME}", text)
-    except Exception as e:
-        logger.warning(f"Couldn't send admin log: {e}")
+# -----------------------
+# Admin notifications
+# -----------------------
+# Labels for coalesced categories: "<id> chatida <count> ta <label>"
+ADMIN_LOG_CATEGORIES = {
+    "bad_word": "taqiqlangan so'z uchun o'chirish",
+    "bad_domain": "qora ro'yxatdagi havola",
+    "link_warn": "havola haqida ogohlantirish",
+    "join": "yangi a'zo",
+    "verified": "tasdiqlash",
+}
+
+
+class AdminNotifier:
+    """Background sender for admin logs; handlers only enqueue.
+
+    Plain messages are buffered (bounded, drops counted) and sent together every
+    ADMIN_LOG_FLUSH_INTERVAL seconds. Categorized events are only counted per
+    (category, chat) and reported once per ADMIN_LOG_COALESCE_WINDOW. Output is
+    split to Telegram's message limit and sent through a token bucket.
+    """
+
+    def __init__(self, bot_obj: Bot, flush_interval: float = ADMIN_LOG_FLUSH_INTERVAL, coalesce_window: float = ADMIN_LOG_COALESCE_WINDOW,
+                 max_buffer: int = ADMIN_LOG_BUFFER, rate: float = ADMIN_LOG_RATE):
+        self.bot = bot_obj
+        self.flush_interval = flush_interval
+        self.coalesce_window = coalesce_window
+        self.max_buffer = max_buffer
+        self.bucket = TokenBucket(rate)
+        self.dropped = 0
+        self._buffer: deque = deque()
+        self._counts: Counter = Counter()  # (category, chat_id) -> count
+        self._samples: dict = {}  # (category, chat_id) -> last text
+        self._last_coalesce = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _admin_chat():
+        # numeric id if set, otherwise via @username
+        return ADMIN_CHAT_ID or f"@{ADMIN_USERNAME}"
+
+    def notify(self, text: str, category: Optional[str] = None, chat_id=None):
+        if category:
+            key = (category, chat_id)
+            self._counts[key] += 1
+            self._samples[key] = text[:200]
+            return
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(text)
+
+    def _render_coalesced(self) -> Optional[str]:
+        counts, self._counts = self._counts, Counter()
+        samples, self._samples = self._samples, {}
+        self._last_coalesce = time.monotonic()
+        if not counts:
+            return None
+        lines = [f"So'nggi {self.coalesce_window} soniya bo'yicha xulosa:"]
+        for (category, chat_id), n in counts.most_common():
+            label = ADMIN_LOG_CATEGORIES.get(category, category)
+            lines.append(f"• {chat_id} chatida {n} ta {label} (oxirgisi: {samples[(category, chat_id)]})")
+        return "\n".join(lines)
+
+    async def _send(self, text: str):
+        for chunk in split_message(text):
+            try:
+                await call_with_retry(self.bucket, lambda: self.bot.send_message(self._admin_chat(), chunk))
+            except Exception as e:
+                logger.warning(f"Couldn't send admin log: {e}")
+
+    async def flush(self, force_coalesced: bool = False):
+        parts = []
+        while self._buffer:
+            parts.append(self._buffer.popleft())
+        if self.dropped:
+            parts.append(f"⚠️ {self.dropped} ta admin log xabari tashlab yuborildi (bufer to'la)")
+            self.dropped = 0
+        if force_coalesced or time.monotonic() - self._last_coalesce >= self.coalesce_window:
+            summary = self._render_coalesced()
+            if summary:
+                parts.append(summary)
+        if parts:
+            await self._send("\n\n".join(parts))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("admin notifier flush error")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(force_coalesced=True)
+
+
+admin_notifier = AdminNotifier(bot)
+
+
+def send_admin_log(text: str, category: Optional[str] = None, chat_id=None):
+    """Queue an admin log; returns immediately. Categorized events are coalesced into counts."""
+    admin_notifier.notify(text, category, chat_id)
+
+
+# -----------------------
+# Verification expiry
+# -----------------------
+class ExpiryExecutor:
+    """Bans users whose verification expired, in rate-limited batches.
+
+    Bans go through a shared token bucket with a concurrency cap and honour
+    TelegramRetryAfter. Instead of one admin message per user, results are
+    collected and sent as a single summary per BAN_SUMMARY_WINDOW.
+    """
+
+    def __init__(self, bot_obj: Bot, rate: float = BAN_RATE, concurrency: int = BAN_CONCURRENCY, summary_window: float = BAN_SUMMARY_WINDOW):
+        self.bot = bot_obj
+        self.bucket = TokenBucket(rate)
+        self.concurrency = concurrency
+        self.summary_window = summary_window
+        self._banned: dict = {}  # group_id -> [user_id]
+        self._failed: dict = {}  # group_id -> [user_id]
+        self._summary_task: Optional[asyncio.Task] = None
+        self._backlog_task: Optional[asyncio.Task] = None
+
+    async def _ban(self, sem: asyncio.Semaphore, user_id: int, group_id: int):
+        async with sem:
+            try:
+                await call_with_retry(self.bucket, lambda: self.bot.ban_chat_member(group_id, user_id))
+                # unban to allow permanent removal? Keep banned state
+                self._banned.setdefault(group_id, []).append(user_id)
+            except Exception as e:
+                logger.warning(f"Failed to ban user {user_id} after timeout: {e}")
+                self._failed.setdefault(group_id, []).append(user_id)
+
+    async def ban_many(self, targets: list):
+        """Ban every (user_id, group_id) in targets and queue them for the admin summary."""
+        if not targets:
+            return
+        sem = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._ban(sem, uid, gid) for uid, gid in targets))
+        if self._summary_task is None or self._summary_task.done():
+            self._summary_task = asyncio.create_task(self._send_summary_later())
+
+    def ban_backlog(self, targets: list, chunk: int = BAN_BACKLOG_CHUNK):
+        """Ban targets in the background; each chunk's pending rows are cleared once it is done."""
+        if targets:
+            self._backlog_task = asyncio.create_task(self._ban_backlog(targets, chunk))
+
+    async def _ban_backlog(self, targets: list, chunk: int):
+        started = time.perf_counter()
+        for i in range(0, len(targets), chunk):
+            part = targets[i:i + chunk]
+            await self.ban_many(part)
+            await clear_pending_verifications_async([uid for uid, _ in part])
+        logger.info(f"Expired backlog of {len(targets)} verifications handled in {time.perf_counter() - started:.1f}s")
+
+    async def _send_summary_later(self):
+        await asyncio.sleep(self.summary_window)
+        await self.flush_summary()
+
+    async def flush_summary(self):
+        banned, self._banned = self._banned, {}
+        failed, self._failed = self._failed, {}
+        if not banned and not failed:
+            return
+        lines = [f"Tasdiqlash muddati o'tdi (so'nggi {self.summary_window} soniya):"]
+        for gid, uids in banned.items():
+            lines.append(f"guruh {gid}: {len(uids)} ta ban qilindi — {', '.join(map(str, uids[:20]))}{' …' if len(uids) > 20 else ''}")
+        for gid, uids in failed.items():
+            lines.append(f"guruh {gid}: {len(uids)} tasini ban qilib bo'lmadi — {', '.join(map(str, uids[:20]))}{' …' if len(uids) > 20 else ''}")
+        send_admin_log("\n".join(lines))
+
+    async def stop(self):
+        # An unfinished backlog keeps its pending rows and resumes on next start
+        if self._backlog_task and not self._backlog_task.done():
+            self._backlog_task.cancel()
+            await asyncio.gather(self._backlog_task, return_exceptions=True)
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+        await self.flush_summary()
+
+
+expiry_executor = ExpiryExecutor(bot)
+
+
+async def expire_verifications(user_ids: list):
+    # Called by the scheduler with every user whose deadline passed at once
+    verified = await get_verified_users_async(user_ids)
+    await clear_pending_verifications_async(user_ids)
+    targets = []
+    for uid in user_ids:
+        entry = pending_verification.pop(uid, None)
+        if entry is None or uid in verified:
+            continue
+        targets.append((uid, entry["group_id"]))
+    await expiry_executor.ban_many(targets)
+
+
+verification_scheduler = VerificationScheduler(expire_verifications)
+
+
+async def restore_pending_state():
+    """Reload in-flight verifications after a restart.
+
+    Deadlines that passed while the bot was down are swept in the DB and banned
+    by a background task, so startup never waits on rate-limited bans. Only the
+    deadlines still ahead are loaded into memory and the scheduler.
+    """
+    started = time.perf_counter()
+    now = time.time()
+    expired = await sweep_expired_pending_async(now)
+    verifications, fields = await load_pending_state_async(now)
+    for uid, group_id, chat_title, joined_at, deadline, has_phone in verifications:
+        pending_verification[uid] = {
+            "group_id": group_id,
+            "chat_title": chat_title,
+            "joined_at": datetime.fromisoformat(joined_at) if joined_at else None,
+            "deadline": deadline,
+            "has_phone": bool(has_phone),
+        }
+        verification_scheduler.schedule(uid, deadline)
+    pending_field.update(fields)
+    expiry_executor.ban_backlog(expired)
+    logger.info(
+        f"Restored pending state in {(time.perf_counter() - started) * 1000:.0f} ms: "
+        f"{len(verifications)} active, {len(expired)} expired (banning in background), {len(fields)} fields"
+    )
 
 
 # -----------------------
@@ -209,7 +1001,7 @@ async def send_admin_log(text: str):
 # -----------------------
 
 # /start - user starts bot (or when DM from bot)
-@dp.message.register(Command("start"))
+@dp.message(Command("start"))
 async def cmd_start(message: types.Message):
     kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     kb.add(KeyboardButton("📲 Telefon raqamini yuborish", request_contact=True))
@@ -221,12 +1013,12 @@ async def cmd_start(message: types.Message):
 
 
 # Contact handler: user shares phone
-@dp.message.register(lambda m: m.contact is not None)
+@dp.message(lambda m: m.contact is not None)
 async def contact_handler(message: types.Message):
     contact = message.contact
     user = message.from_user
     phone = contact.phone_number
-    save_contact(user.id, user.username, phone)
+    await save_contact_async(user.id, user.username, phone)
 
     # Inline keyboard to gather ism/familiya/yosh
     kb = InlineKeyboardMarkup(inline_keyboard=[
@@ -240,45 +1032,46 @@ async def contact_handler(message: types.Message):
     # if user was pending verification (keldi va yubordi) mark partially saved
     if user.id in pending_verification:
         pending_verification[user.id]["has_phone"] = True
+        await set_pending_has_phone_async(user.id)
         await message.answer("Siz telefon yubordingiz. Iltimos boshqa maydonlarni to'ldiring yoki tasdiqlang.")
 
 
 # Inline callback to set which field user will fill next or finish verification
-@dp.callback_query.register(lambda c: c.data and (c.data.startswith("fill_") or c.data == "finish_verify"))
+@dp.callback_query(lambda c: c.data and (c.data.startswith("fill_") or c.data == "finish_verify"))
 async def callback_fill(cq: types.CallbackQuery):
     user = cq.from_user
     data = cq.data
     if data.startswith("fill_"):
         field = data.split("_", 1)[1]  # ism/familiya/yosh
         pending_field[user.id] = field
+        await set_pending_field_async(user.id, field)
         await cq.message.answer(f"Iltimos { 'ism' if field=='ism' else ('familiya' if field=='familiya' else 'yosh') } yozing:")
         await cq.answer()
         return
     elif data == "finish_verify":
         # Mark verified if minimal data present (phone at least)
         # Check DB if phone exists
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
-        c.execute("SELECT telefon FROM users WHERE user_id = ?", (user.id,))
-        row = c.fetchone()
-        conn.close()
-        if row and row[0]:
-            mark_verified(user.id)
-            # cancel timeout task
-            if user.id in pending_verification:
-                task = pending_verification[user.id].get("task")
-                if task:
-                    task.cancel()
-                pending_verification.pop(user.id, None)
+        phone = await get_user_phone_async(user.id)
+        if phone:
+            await mark_verified_async(user.id)
+            # cancel verification deadline
+            verification_scheduler.cancel(user.id)
+            entry = pending_verification.pop(user.id, None)
+            if entry is not None:
+                await clear_pending_verifications_async([user.id])
             await cq.message.answer("✅ Siz tasdiqlandingiz. Guruhga kirishingiz normal davom etadi.")
-            await send_admin_log(f"User verified: ID:{user.id} @{user.username or '-'}")
+            # Count the verification against the group the user joined, not the DM chat
+            if entry is not None:
+                send_admin_log(f"User verified: ID:{user.id} @{user.username or '-'} in {entry['chat_title'] or entry['group_id']}", "verified", entry["group_id"])
+            else:
+                send_admin_log(f"User verified: ID:{user.id} @{user.username or '-'}", "verified", cq.message.chat.id)
             await cq.answer("Tashakkur.")
         else:
             await cq.answer("Iltimos avval telefon yuboring.", show_alert=True)
 
 
 # Catch plain text messages (either filling fields or normal group messages)
-@dp.message.register()
+@dp.message()
 async def handle_message(message: types.Message):
     user = message.from_user
     text = (message.text or "").strip()
@@ -288,28 +1081,29 @@ async def handle_message(message: types.Message):
     # If user is filling a pending field:
     if user.id in pending_field and text:
         field = pending_field.pop(user.id)
+        await set_pending_field_async(user.id, None)
         if field == "ism":
-            update_user_field(user.id, "ism", text)
+            await update_user_field_async(user.id, "ism", text)
             await message.answer("✅ Ism saqlandi.")
         elif field == "familiya":
-            update_user_field(user.id, "familiya", text)
+            await update_user_field_async(user.id, "familiya", text)
             await message.answer("✅ Familiya saqlandi.")
         elif field == "yosh":
             # validate yosh numeric
             try:
                 y = int(text)
-                update_user_field(user.id, "yosh", y)
+                await update_user_field_async(user.id, "yosh", y)
                 await message.answer("✅ Yosh saqlandi.")
             except Exception:
                 await message.answer("Iltimos yoshni raqam bilan kiriting.")
                 return
         # log and reward small trust (ball system can be implemented)
-        log_message(user.id, username, chat_id, f"Filled field {field}: {text}", deleted=0)
+        message_log.log(user.id, username, chat_id, f"Filled field {field}: {text}", deleted=0)
         return
 
     # Otherwise, normal message — if in group, log and check
     # Log message
-    log_message(user.id, username, chat_id, text, deleted=0)
+    message_log.log(user.id, username, chat_id, text, deleted=0)
 
     # Only process textual content
     if not text:
@@ -322,10 +1116,10 @@ async def handle_message(message: types.Message):
             await message.delete()
         except Exception as e:
             logger.warning(f"Couldn't delete message: {e}")
-        log_message(user.id, username, chat_id, text, deleted=1, reason=f"bad_word:{bad}")
+        message_log.log(user.id, username, chat_id, text, deleted=1, reason=f"bad_word:{bad}")
         await message.reply(f"{message.from_user.first_name}, nojo'ya so'z ishlatdingiz: `{bad}`. Xabar o'chirildi.", parse_mode="Markdown")
         # notify admin
-        await send_admin_log(f"Bad word detected: user={user.id}@{username or '-'} word={bad} chat={chat_id} text={text[:200]}")
+        send_admin_log(f"Bad word detected: user={user.id}@{username or '-'} word={bad} text={text[:200]}", "bad_word", chat_id)
         return
 
     # Check for URLs and blacklisted domains
@@ -336,15 +1130,15 @@ async def handle_message(message: types.Message):
                 await message.delete()
             except Exception as e:
                 logger.warning(f"Couldn't delete message w/ bad dom: {e}")
-            log_message(user.id, username, chat_id, text, deleted=1, reason=f"bad_domain:{bad_dom}")
+            message_log.log(user.id, username, chat_id, text, deleted=1, reason=f"bad_domain:{bad_dom}")
             await message.reply(f"{message.from_user.first_name}, xavfli yoki qora ro‘yxatdagi domen: `{bad_dom}`. Xabar o'chirildi.", parse_mode="Markdown")
-            await send_admin_log(f"Blacklisted domain posted: user={user.id}@{username or '-'} domain={bad_dom} chat={chat_id} text={text[:200]}")
+            send_admin_log(f"Blacklisted domain posted: user={user.id}@{username or '-'} domain={bad_dom} text={text[:200]}", "bad_domain", chat_id)
             return
         else:
             # not blacklisted, but is link — warn (and log)
             await message.reply("E'tibor: havola joylatdingiz. Iltimos reklama va zararli havolalardan saqlaning.")
-            log_message(user.id, username, chat_id, text, deleted=0, reason="link_warn")
-            await send_admin_log(f"User posted link (not blacklisted): user={user.id}@{username or '-'} chat={chat_id} text={text[:200]}")
+            message_log.log(user.id, username, chat_id, text, deleted=0, reason="link_warn")
+            send_admin_log(f"User posted link (not blacklisted): user={user.id}@{username or '-'} text={text[:200]}", "link_warn", chat_id)
             return
 
     # otherwise normal message — just log
@@ -352,7 +1146,7 @@ async def handle_message(message: types.Message):
 
 
 # Chat member updates — when someone joins group or promoted/left
-@dp.chat_member.register()
+@dp.chat_member()
 async def chat_member_update(update: types.ChatMemberUpdated):
     try:
         old = update.old_chat_member
@@ -365,48 +1159,20 @@ async def chat_member_update(update: types.ChatMemberUpdated):
             try:
                 # First create pending entry to enforce verification
                 # We'll store group chat id so we know which group they joined
-                if user.id in pending_verification:
-                    # already pending; reset timer
-                    task = pending_verification[user.id].get("task")
-                    if task:
-                        task.cancel()
+                # (re-joining while pending simply resets the deadline)
+                deadline = time.time() + VERIFICATION_TIMEOUT
                 pending_verification[user.id] = {
                     "group_id": chat.id,
                     "chat_title": chat.title or str(chat.id),
                     "joined_at": datetime.utcnow(),
+                    "deadline": deadline,
                     "has_phone": False,
-                    "task": None,
                 }
-
+                await save_pending_verification_async(
+                    user.id, chat.id, chat.title or str(chat.id), pending_verification[user.id]["joined_at"].isoformat(), deadline
+                )
                 # schedule timeout to kick if not verified
-                async def verification_timeout(uid: int):
-                    try:
-                        await asyncio.sleep(VERIFICATION_TIMEOUT)
-                        # if still pending and not verified -> kick
-                        conn = sqlite3.connect(DB_FILE)
-                        c = conn.cursor()
-                        c.execute("SELECT verified FROM users WHERE user_id = ?", (uid,))
-                        row = c.fetchone()
-                        conn.close()
-                        verified = bool(row and row[0])
-                        if not verified and uid in pending_verification:
-                            group_id = pending_verification[uid]["group_id"]
-                            # Attempt kick
-                            try:
-                                await bot.ban_chat_member(group_id, uid)
-                                # unban to allow permanent removal? Keep banned state
-                            except Exception as e:
-                                logger.warning(f"Failed to ban user {uid} after timeout: {e}")
-                            await send_admin_log(f"User {uid} was not verified in time and was banned from group {group_id}.")
-                            pending_verification.pop(uid, None)
-                    except asyncio.CancelledError:
-                        # canceled because user verified earlier
-                        return
-                    except Exception as e:
-                        logger.exception("verification timeout error")
-
-                task = asyncio.create_task(verification_timeout(user.id))
-                pending_verification[user.id]["task"] = task
+                verification_scheduler.schedule(user.id, deadline)
 
                 # Try send private message with /start flow
                 kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
@@ -422,11 +1188,11 @@ async def chat_member_update(update: types.ChatMemberUpdated):
                     f"Iltimos {VERIFICATION_TIMEOUT//60} daqiqa ichida bajarishingiz kerak. Aks holda adminlar avtomatik chetlatishi mumkin."
                 )
                 await bot.send_message(user.id, dm_text, reply_markup=kb, parse_mode="Markdown")
-                await send_admin_log(f"New member {user.id}@{user.username or '-'} joined group {chat.title or chat.id}. DM sent for verification.")
+                send_admin_log(f"New member {user.id}@{user.username or '-'} joined {chat.title or chat.id}, DM sent for verification.", "join", chat.id)
             except Exception as e:
                 # if bot can't DM - log and notify admin (user privacy settings)
                 logger.warning(f"Couldn't DM new member {user.id}: {e}")
-                await send_admin_log(f"Couldn't DM new member {user.id}@{user.username or '-'} who joined {chat.title or chat.id}. They might not receive verification dm.")
+                send_admin_log(f"Couldn't DM new member {user.id}@{user.username or '-'} who joined {chat.title or chat.id}. They might not receive verification dm.")
         else:
             # other status changes not handled specifically
             return
@@ -435,7 +1201,7 @@ async def chat_member_update(update: types.ChatMemberUpdated):
 
 
 # Admin commands: /stats, /ban, /logs
-@dp.message.register(Command("stats"))
+@dp.message(Command("stats"))
 async def cmd_stats(message: types.Message):
     # Only allow admins: either username matches ADMIN_USERNAME or they are group admin in chat
     if not (message.from_user.username and message.from_user.username.lower() == ADMIN_USERNAME.lower()):
@@ -450,13 +1216,12 @@ async def cmd_stats(message: types.Message):
         except Exception:
             await message.reply("❌ Siz admin emassiz.")
             return
-    text = get_stats_text()
-    MAX = 4000
-    for i in range(0, len(text), MAX):
-        await message.answer(text[i : i + MAX])
+    text = await get_stats_text_async()
+    for chunk in split_message(text):
+        await message.answer(chunk)
 
 
-@dp.message.register(Command("ban"))
+@dp.message(Command("ban"))
 async def cmd_ban(message: types.Message):
     # usage: /ban <user_id>
     if not (message.from_user.username and message.from_user.username.lower() == ADMIN_USERNAME.lower()):
@@ -481,43 +1246,53 @@ async def cmd_ban(message: types.Message):
     try:
         await bot.ban_chat_member(message.chat.id, uid)
         await message.reply(f"✅ Foydalanuvchi {uid} guruhdan bloklandi.")
-        await send_admin_log(f"Admin {message.from_user.id} banned {uid} in chat {message.chat.id}")
+        send_admin_log(f"Admin {message.from_user.id} banned {uid} in chat {message.chat.id}")
     except Exception as e:
         await message.reply(f"Xatolik: {e}")
 
 
-@dp.message.register(Command("logs"))
+@dp.message(Command("logs"))
 async def cmd_logs(message: types.Message):
     # Only admin can request logs
     if not (message.from_user.username and message.from_user.username.lower() == ADMIN_USERNAME.lower()):
         await message.reply("❌ Siz admin emassiz.")
         return
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("SELECT ts, user_id, username, chat_id, message_text, reason FROM logs ORDER BY id DESC LIMIT 100")
-    rows = c.fetchall()
-    conn.close()
+    rows = await get_recent_logs_async(100)
     text = "🔍 Oxirgi 100 log:\n"
     for r in rows:
         ts, uid, uname, chatid, msg, reason = r
         text += f"{ts} | {uid}@{uname or '-'} | chat:{chatid} | reason:{reason or '-'}\n{(msg or '')[:200]}\n\n"
-    MAX = 4000
-    for i in range(0, len(text), MAX):
-        await message.answer(text[i : i + MAX])
+    for chunk in split_message(text):
+        await message.answer(chunk)
 
 
 # -----------------------
 # Startup / shutdown
 # -----------------------
 async def on_startup():
-    init_db()
+    await init_db_async()
+    if BLACKLIST_FILE and os.path.exists(BLACKLIST_FILE):
+        try:
+            await asyncio.to_thread(load_domain_blacklist, BLACKLIST_FILE)
+        except Exception as e:
+            logger.warning(f"Couldn't load blacklist file {BLACKLIST_FILE}: {e}")
+    message_log.start()
+    admin_notifier.start()
+    await restore_pending_state()
+    verification_scheduler.start()
     logger.info("Bot started")
     # optional: notify admin bot started
-    await send_admin_log("Security bot started.")
+    send_admin_log("Security bot started.")
 
 
 async def on_shutdown():
+    await verification_scheduler.stop()
+    await expiry_executor.stop()
+    await admin_notifier.stop()
     await bot.close()
+    await message_log.stop()
+    db_executor.shutdown()
+    close_all_pools()
     logger.info("Bot stopped")
 
 
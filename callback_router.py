@@ -0,0 +1,148 @@
+# callback_router.py
+# Registry-based routing of inline-button callback data for bot.py.
+#
+# Routes are registered once with @router.route(...). Exact callback strings
+# live in a dict; prefixed ones ("admin_approve_<id>") in a character trie, so
+# resolving a callback costs O(len(data)) however many buttons the menus grow.
+# The longest matching prefix wins and exact matches beat prefixes.
+#
+# CallbackRouteMiddleware resolves the route once per update, enforces
+# admin-only routes, parses the payload and records per-route latency.
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from aiogram import BaseMiddleware
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass
+class Route:
+    name: str
+    handler: Callable[..., Awaitable[Any]]
+    admin: bool = False
+    payload: Optional[Callable[[str], Any]] = None  # parses the text after the matched key
+
+
+@dataclass
+class CallbackContext:
+    """What the middleware hands to every callback handler."""
+    route: Optional[Route]
+    payload: Any = None
+    is_admin: bool = False
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (max for the open bucket)."""
+        if not self.total:
+            return 0.0
+        rank = q * self.total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.bounds[i]) if i < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+
+class CallbackRouter:
+    def __init__(self):
+        self._exact: dict[str, Route] = {}
+        self._trie: dict = {}
+        self.latency: dict[str, LatencyHistogram] = {}
+
+    def route(self, *keys: str, prefix: str = None, admin: bool = False, payload=None, name: str = None):
+        """Register the decorated handler for exact ``keys`` and/or a ``prefix``."""
+        def decorator(handler):
+            route = Route(name or handler.__name__, handler, admin, payload)
+            for key in keys:
+                if key in self._exact:
+                    raise ValueError(f"Callback {key!r} already routed to {self._exact[key].name}")
+                self._exact[key] = route
+            if prefix is not None:
+                node = self._trie
+                for ch in prefix:
+                    node = node.setdefault(ch, {})
+                if None in node:
+                    raise ValueError(f"Callback prefix {prefix!r} already routed to {node[None].name}")
+                node[None] = route  # None marks "a route ends here"
+            self.latency.setdefault(route.name, LatencyHistogram())
+            return handler
+        return decorator
+
+    def resolve(self, data: str):
+        """Return (route, rest) for ``data``; route is None when nothing matches."""
+        route = self._exact.get(data)
+        if route is not None:
+            return route, ""
+        best, best_len = None, 0
+        node = self._trie
+        for i, ch in enumerate(data):
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                best, best_len = node[None], i + 1
+        return best, data[best_len:]
+
+    def observe(self, name: str, ms: float):
+        self.latency.setdefault(name, LatencyHistogram()).observe(ms)
+
+    def latency_report(self) -> str:
+        lines = []
+        for name, h in sorted(self.latency.items(), key=lambda kv: -kv[1].total):
+            if h.total:
+                lines.append(f"{name}: {h.total} ta, o'rtacha {h.sum_ms / h.total:.0f} ms, "
+                             f"p50≤{h.quantile(0.5):.0f} p95≤{h.quantile(0.95):.0f} max {h.max_ms:.0f} ms")
+        return "\n".join(lines)
+
+
+class CallbackRouteMiddleware(BaseMiddleware):
+    """Resolves the route, gates admin-only routes and times the handler.
+
+    The handler receives a CallbackContext as ``callback_ctx``. ``on_denied``
+    is awaited with the callback query when a non-admin hits an admin route.
+    """
+
+    def __init__(self, router: CallbackRouter, is_admin: Callable[[Any], bool], on_denied):
+        self.router = router
+        self.is_admin = is_admin
+        self.on_denied = on_denied
+
+    async def __call__(self, handler, event, data):
+        route, rest = self.router.resolve(event.data or "")
+        admin = self.is_admin(event.from_user)
+        payload = None
+        if route is not None and route.payload is not None:
+            try:
+                payload = route.payload(rest)
+            except (ValueError, IndexError) as e:
+                logging.warning(f"Bad callback payload {event.data!r} for {route.name}: {str(e)}")
+                route = None
+        if route is not None and route.admin and not admin:
+            await self.on_denied(event)
+            return
+        data["callback_ctx"] = CallbackContext(route, payload, admin)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.router.observe(route.name if route else "<unmatched>", (time.perf_counter() - start) * 1000)
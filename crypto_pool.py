@@ -0,0 +1,176 @@
+# crypto_pool.py
+# Batch Fernet encryption/decryption for bot.py.
+#
+# Small batches run inline. Large ones (admin listings, backfills) are split into
+# chunks and spread over a process pool, since Fernet is CPU-bound and threads
+# would only take turns on the GIL. Workers are started with the "spawn" method and
+# only import this module, so they never load bot.py, aiogram or the bot's
+# thread pools, and cannot inherit a lock some other thread held at fork time.
+#
+# Callers on the event loop should use the *_async variants: they wait for the
+# batch on a worker thread, so neither the loop nor the DB thread is blocked.
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import Fernet
+
+
+class LRUCache:
+    """Thread-safe LRU of ciphertext -> plaintext.
+
+    Fernet tokens are unique per encryption, so a ciphertext always decrypts to
+    the same value and caching it is safe. ``maxsize=0`` disables the cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.maxsize:
+            return None
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize or value is None:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -----------------------
+# Worker side
+# -----------------------
+_worker_cipher = None
+
+
+def _init_worker(key: bytes):
+    global _worker_cipher
+    _worker_cipher = Fernet(key)
+
+
+# Chunk functions run in worker processes (or inline with an explicit cipher):
+# no logging per value, failures come back as None.
+def _encrypt_chunk(values, cipher=None):
+    cipher = cipher or _worker_cipher
+    return [cipher.encrypt(str(v).encode()).decode() for v in values]
+
+
+def _decrypt_chunk(tokens, cipher=None):
+    cipher = cipher or _worker_cipher
+    out = []
+    for t in tokens:
+        try:
+            out.append(cipher.decrypt(t.encode()).decode())
+        except Exception:
+            out.append(None)
+    return out
+
+
+# -----------------------
+# Pool
+# -----------------------
+class CryptoPool:
+    """Batch encrypt/decrypt with one key, parallel above ``parallel_threshold`` values.
+
+    The process pool is created on the first large batch and lives until
+    ``shutdown()``.
+    """
+
+    def __init__(self, key: bytes, workers=None, parallel_threshold: int = 5000, chunk_size: int = 2000, cache_size: int = 20000):
+        self.key = key
+        self.cipher = Fernet(key)
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self.cache = LRUCache(cache_size)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.key,),
+                )
+            return self._pool
+
+    def _run_chunked(self, func, values):
+        if len(values) < self.parallel_threshold:
+            return func(values, self.cipher)
+        chunks = [values[i:i + self.chunk_size] for i in range(0, len(values), self.chunk_size)]
+        return [v for chunk in self._get_pool().map(func, chunks) for v in chunk]
+
+    def encrypt_many(self, values):
+        """Encrypt a list; empty values stay None, like ``encrypt_data(x) if x else None``."""
+        todo = [i for i, v in enumerate(values) if v]
+        out = [None] * len(values)
+        try:
+            for i, token in zip(todo, self._run_chunked(_encrypt_chunk, [values[i] for i in todo])):
+                out[i] = token
+        except Exception as e:
+            logging.error(f"Batch encryption error: {str(e)}")
+        return out
+
+    def decrypt_many(self, tokens, use_cache: bool = True):
+        """Decrypt a list; empty or undecryptable tokens come back as None."""
+        out = [None] * len(tokens)
+        misses = []
+        for i, t in enumerate(tokens):
+            if not t:
+                continue
+            cached = self.cache.get(t) if use_cache else None
+            if cached is not None:
+                out[i] = cached
+            else:
+                misses.append(i)
+        if not misses:
+            return out
+        try:
+            values = self._run_chunked(_decrypt_chunk, [tokens[i] for i in misses])
+        except Exception as e:
+            logging.error(f"Batch decryption error: {str(e)}")
+            return out
+        failed = 0
+        for i, value in zip(misses, values):
+            out[i] = value
+            if value is None:
+                failed += 1
+            elif use_cache:
+                self.cache.put(tokens[i], value)
+        if failed:
+            logging.error(f"Decryption error: {failed} of {len(misses)} values failed")
+        return out
+
+    async def encrypt_many_async(self, values):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.encrypt_many, values)
+
+    async def decrypt_many_async(self, tokens, use_cache: bool = True):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.decrypt_many, tokens, use_cache))
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,155 @@
+# db_pool.py
+# Shared SQLite connection layer for bot.py and bot500.py.
+#
+# Connections are long-lived: each thread checks out its own connection per
+# database file and keeps it for the life of the process, so hot helpers no
+# longer pay connect/close and schema parsing on every call.
+#
+# DBExecutor moves the (blocking) helpers off the asyncio event loop: calls are
+# queued to a dedicated DB thread and awaited, so a slow fsync or lock wait only
+# delays other DB work, not every update the bot is handling.
+import asyncio
+import functools
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# -----------------------
+# Tuning
+# -----------------------
+BUSY_TIMEOUT_MS = 5000
+CACHED_STATEMENTS = 256  # prepared statements kept per connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # ~16 MB page cache
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+
+class ConnectionPool:
+    """Per-thread pool of long-lived connections to one SQLite file.
+
+    sqlite3 connections must not be shared between threads, so the pool keeps
+    one connection per thread. Coroutines running on the event loop thread
+    share that thread's connection, which is safe as long as no ``await``
+    happens inside a ``connection()`` block.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_file,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,  # only closed from another thread in close_all()
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._all.append(conn)
+        logging.debug(f"Opened pooled connection to {self.db_file} in {threading.current_thread().name}")
+        return conn
+
+    def checkout(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield the thread's connection; roll back on error, commit leftovers on success."""
+        conn = self.checkout()
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        else:
+            if conn.in_transaction:
+                conn.commit()
+
+    def close_all(self):
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception as e:
+                logging.warning(f"Error closing pooled connection: {e}")
+        self._local = threading.local()
+        logging.info(f"Closed {len(conns)} pooled connection(s) to {self.db_file}")
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_file: str) -> ConnectionPool:
+    """Return the process-wide pool for ``db_file``, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(db_file)
+        if pool is None:
+            pool = _pools[db_file] = ConnectionPool(db_file)
+        return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+# -----------------------
+# Async access
+# -----------------------
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.error(f"Background DB call failed: {future.exception()}")
+
+
+class DBExecutor:
+    """Runs blocking DB helpers on dedicated worker thread(s).
+
+    With the default single worker all DB work is serialized on one thread and
+    one pooled connection, which is what SQLite wants for writes anyway.
+    """
+
+    def __init__(self, workers: int = 1, name: str = "db"):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func`` on the DB thread without waiting for it (fire-and-forget)."""
+        future = self._pool.submit(func, *args, **kwargs)
+        future.add_done_callback(_log_failure)
+        return future
+
+    def wrap(self, func):
+        """Return an awaitable version of the blocking helper ``func``."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func, *args, **kwargs)
+        wrapper.__name__ = f"{func.__name__}_async"
+        wrapper.__qualname__ = wrapper.__name__
+        return wrapper
+
+    def shutdown(self):
+        # Waits for queued work so nothing already accepted is lost on exit
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,146 @@
+# instagram_pool.py
+# Pool of logged-in instagrapi clients for bot.py.
+#
+# Logging in is slow and rate-limited by Instagram, so each account logs in once
+# and its session is kept on disk (dump_settings/load_settings) and reused across
+# restarts. All instagrapi calls are blocking HTTP, so they run on a thread pool
+# instead of the event loop.
+#
+# Idle accounts wait in an asyncio.Queue: a follow takes the next free account,
+# waits out that account's minimum interval, and hands it back. Callers queue up
+# in FIFO order when every account is busy or cooling down.
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from instagrapi import Client
+from instagrapi.exceptions import LoginRequired, PleaseWaitFewMinutes
+
+# -----------------------
+# Tuning
+# -----------------------
+MIN_FOLLOW_INTERVAL = 30  # seconds between follows from one account
+COOLDOWN_ON_PLEASE_WAIT = 600  # seconds an account rests after "please wait a few minutes"
+USER_ID_CACHE_SIZE = 10000  # username -> user_id lookups kept in memory
+
+
+class _Account:
+    """One Instagram login and its (lazily created) client."""
+
+    def __init__(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        self.client = None
+        self.next_allowed = 0.0  # time.monotonic() before which the account must not act
+
+
+class InstagramClientPool:
+    """Round-robins follow requests over several logged-in accounts.
+
+    ``client_factory`` builds a client and defaults to instagrapi's Client; pass
+    a stub to exercise the pool without touching Instagram.
+    """
+
+    def __init__(self, accounts, sessions_dir: str = "instagram_sessions", proxy: dict = None,
+                 min_interval: float = MIN_FOLLOW_INTERVAL, workers: int = None, client_factory=Client):
+        self.sessions_dir = sessions_dir
+        self.proxy = proxy or {}
+        self.min_interval = min_interval
+        self.client_factory = client_factory
+        self._accounts = [_Account(u, p) for u, p in accounts if u and p]
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for account in self._accounts:
+            self._idle.put_nowait(account)
+        self._executor = ThreadPoolExecutor(max_workers=workers or max(1, len(self._accounts)),
+                                            thread_name_prefix="instagram")
+        self._user_ids: OrderedDict = OrderedDict()
+        self._user_ids_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._accounts)
+
+    # -----------------------
+    # Blocking helpers (run on the thread pool)
+    # -----------------------
+    def _session_path(self, account: _Account) -> str:
+        return os.path.join(self.sessions_dir, f"{account.username}.json")
+
+    def _login(self, account: _Account):
+        client = self.client_factory(**self.proxy)
+        path = self._session_path(account)
+        if os.path.exists(path):
+            try:
+                client.load_settings(path)
+            except Exception as e:
+                logging.warning(f"Instagram session for {account.username} unreadable, logging in fresh: {str(e)}")
+        client.login(account.username, account.password)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        client.dump_settings(path)
+        account.client = client
+        logging.info(f"Instagram account {account.username} logged in")
+        return client
+
+    def _user_id(self, client, target: str):
+        key = target.lower().lstrip("@")
+        with self._user_ids_lock:
+            if key in self._user_ids:
+                self._user_ids.move_to_end(key)
+                return self._user_ids[key]
+        user_id = client.user_id_from_username(key)
+        with self._user_ids_lock:
+            self._user_ids[key] = user_id
+            if len(self._user_ids) > USER_ID_CACHE_SIZE:
+                self._user_ids.popitem(last=False)
+        return user_id
+
+    def _follow(self, account: _Account, target: str):
+        for attempt in (1, 2):
+            client = account.client or self._login(account)
+            try:
+                user_id = self._user_id(client, target)
+                client.user_follow(user_id)
+                return user_id
+            except LoginRequired:
+                # Stored session expired server-side: log in again once, then give up
+                account.client = None
+                if attempt == 2:
+                    raise
+                logging.warning(f"Instagram session for {account.username} expired, re-logging in")
+
+    # -----------------------
+    # Async API
+    # -----------------------
+    async def follow(self, target: str):
+        """Follow ``target`` from the next free account; returns the target's user id."""
+        if not self._accounts:
+            raise RuntimeError("No Instagram accounts configured")
+        account = await self._idle.get()
+        try:
+            wait = account.next_allowed - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(self._executor, functools.partial(self._follow, account, target))
+            except PleaseWaitFewMinutes:
+                account.next_allowed = time.monotonic() + COOLDOWN_ON_PLEASE_WAIT
+                logging.warning(f"Instagram account {account.username} throttled, resting {COOLDOWN_ON_PLEASE_WAIT}s")
+                raise
+        finally:
+            account.next_allowed = max(account.next_allowed, time.monotonic() + self.min_interval)
+            self._idle.put_nowait(account)
+
+    def close(self):
+        # Persist the latest cookies so the next start skips a full login
+        for account in self._accounts:
+            if account.client is not None:
+                try:
+                    account.client.dump_settings(self._session_path(account))
+                except Exception as e:
+                    logging.warning(f"Could not save Instagram session for {account.username}: {str(e)}")
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,76 @@
+# keyboard_cache.py
+# Build-once keyboards for bot.py.
+#
+# The static menus are the same object graph for every update, so they are
+# built a single time and handed out by key (e.g. ("main_menu", True) for the
+# admin variant). Each cached keyboard is also rendered to JSON up front;
+# CachedMarkupSession sends that JSON as-is instead of dumping the pydantic
+# model on every request.
+#
+# Cached keyboards are shared: never mutate one in place, build a new markup
+# from its rows instead.
+import json
+
+from aiohttp import FormData
+from aiogram.client.session.aiohttp import AiohttpSession
+
+
+class KeyboardCache:
+    def __init__(self, json_dumps=json.dumps):
+        self.json_dumps = json_dumps  # must match the session's json_dumps
+        self._markups = {}
+        self._rendered = {}  # id(markup) -> (markup, json)
+
+    def register(self, key, markup):
+        if key in self._markups:
+            raise ValueError(f"Keyboard {key!r} already registered")
+        self._markups[key] = markup
+        self._rendered[id(markup)] = (markup, self.json_dumps(_prune(markup.model_dump(warnings=False))))
+        return markup
+
+    def get(self, key):
+        return self._markups[key]
+
+    def rendered(self, markup):
+        """Pre-rendered JSON for ``markup`` if it is one of ours, else None."""
+        entry = self._rendered.get(id(markup))
+        if entry is not None and entry[0] is markup:
+            return entry[1]
+        return None
+
+    def __len__(self):
+        return len(self._markups)
+
+
+def _prune(value):
+    # Mirrors BaseSession.prepare_value: None fields are not sent
+    if isinstance(value, dict):
+        return {k: _prune(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_prune(v) for v in value if v is not None]
+    return value
+
+
+class CachedMarkupSession(AiohttpSession):
+    """AiohttpSession that sends cached keyboards from their pre-rendered JSON."""
+
+    def __init__(self, keyboards: KeyboardCache, **kwargs):
+        super().__init__(**kwargs)
+        self.keyboards = keyboards
+
+    def build_form_data(self, bot, method):
+        rendered = self.keyboards.rendered(getattr(method, "reply_markup", None))
+        if rendered is None:
+            return super().build_form_data(bot, method)
+        # Same as AiohttpSession.build_form_data, minus dumping the markup
+        form = FormData(quote_fields=False)
+        files = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field("reply_markup", rendered)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
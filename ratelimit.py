@@ -0,0 +1,63 @@
+# ratelimit.py
+# Shared Telegram API rate limiting for bot.py and bot500.py.
+import asyncio
+import logging
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts up to ``capacity``.
+
+    pause() blocks every caller until a flood-wait (retry_after) has passed, so
+    one 429 from Telegram slows down the whole bucket, not just the caller.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            self._tokens = 0
+            self._updated = until  # no tokens accrue while paused
+
+
+async def call_with_retry(bucket: TokenBucket, make_call, attempts: int = 3):
+    """Await ``make_call()`` through ``bucket``, honouring TelegramRetryAfter.
+
+    ``make_call`` must build a fresh coroutine on every call.
+    """
+    for attempt in range(1, attempts + 1):
+        await bucket.acquire()
+        try:
+            return await make_call()
+        except TelegramRetryAfter as e:
+            logging.warning(f"Rate limit hit, pausing {e.retry_after}s (attempt {attempt}/{attempts})")
+            bucket.pause(e.retry_after)
+            if attempt == attempts:
+                raise
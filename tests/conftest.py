@@ -0,0 +1,35 @@
+# Shared fixtures. The bots read their key, database and log files relative to the
+# working directory, so every test session runs in its own temporary directory.
+import os
+import sys
+
+import pytest
+from cryptography.fernet import Fernet
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workdir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("botdata")
+    with open(path / "encryption_key.key", "wb") as f:
+        f.write(Fernet.generate_key())
+    old = os.getcwd()
+    os.chdir(path)
+    yield path
+    os.chdir(old)
+
+
+@pytest.fixture
+def bot500():
+    import bot500 as module
+    module.init_db()
+    return module
+
+
+@pytest.fixture
+def bot():
+    import bot as module
+    module.init_db()
+    return module
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def matcher(bot500):
+    return bot500.BadWordMatcher
+
+
+def test_overlapping_matches_with_offsets(matcher):
+    m = matcher({"he", "she", "his", "hers"})
+    assert sorted(m.find_all("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+    assert m.search("nothing here") == "he"
+    assert m.find_all("clean text") == []
+
+
+def test_offsets_point_into_the_original_text(matcher):
+    m = matcher({"nojoya1"})
+    text = "Salom, NOJOYA1 va nojoya1!"
+    assert m.find_all(text) == [(7, "nojoya1"), (18, "nojoya1")]
+    # "İ" lowercases to two characters; offsets after it must not shift
+    assert m.find_all("İİ nojoya1") == [(3, "nojoya1")]
+
+
+def test_word_boundaries(matcher):
+    loose = matcher({"ass"})
+    strict = matcher({"ass"}, word_boundaries=True)
+    assert loose.search("first class") == "ass"
+    assert strict.search("first class") is None
+    assert strict.search("classic") is None
+    assert strict.find_all("ass! and (ass)") == [(0, "ass"), (10, "ass")]
+
+
+def test_confusables_are_folded(matcher):
+    m = matcher({"nojoya1", "o'g'ri"})
+    assert m.search("n0j0ya1") == "nojoya1"
+    assert m.search("nојоуа1") == "nojoya1"  # Cyrillic о, у, а
+    assert m.search("oʻg‘ri") == "o'g'ri"
+    assert matcher({"nojoya1"}, normalize=False).search("n0j0ya1") is None
+
+
+def test_set_bad_words_rebuilds_only_on_change(bot500, monkeypatch):
+    monkeypatch.setattr(bot500, "BAD_WORDS", set(bot500.BAD_WORDS))
+    m = bot500.BadWordMatcher({"alpha", "beta"})
+    monkeypatch.setattr(bot500, "bad_word_matcher", m)
+    builds = []
+    build = m.build
+    monkeypatch.setattr(m, "build", lambda words: (builds.append(words), build(words)))
+
+    bot500.set_bad_words(["beta", " alpha ", ""])
+    assert builds == []
+    bot500.set_bad_words(["alpha", "gamma"])
+    assert len(builds) == 1
+    assert bot500.contains_bad_word("GAMMA!") == "gamma"
+    assert bot500.contains_bad_word("beta") is None
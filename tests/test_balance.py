@@ -0,0 +1,92 @@
+import random
+import threading
+import time
+
+import pytest
+
+THREADS = 16
+OPS_PER_THREAD = 400
+USERS = 5
+
+
+@pytest.fixture
+def ledger(bot):
+    with bot.db_connection() as conn:
+        for table in ("users", "balance_ledger", "balance_snapshots"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+    for uid in range(1, USERS + 1):
+        bot.add_user(uid, f"user{uid}")
+    return bot
+
+
+def balances(module):
+    with module.db_connection() as conn:
+        users = dict(conn.execute("SELECT user_id, balance FROM users"))
+        ledger = dict(conn.execute("SELECT user_id, SUM(amount) FROM balance_ledger GROUP BY user_id"))
+        snapshots = dict(conn.execute("SELECT user_id, balance FROM balance_snapshots"))
+    return users, ledger, snapshots
+
+
+def test_parallel_credits_and_debits_keep_balance_equal_to_ledger(ledger):
+    applied = [0] * THREADS
+    rejected = [0] * THREADS
+    errors = []
+
+    def worker(n):
+        rng = random.Random(n)
+        try:
+            for _ in range(OPS_PER_THREAD):
+                uid = rng.randint(1, USERS)
+                amount = rng.choice((50, 20, 10, -10, -30, -60))
+                try:
+                    ledger.add_balance(uid, amount, "stress")
+                    applied[n] += amount
+                except ValueError:
+                    rejected[n] += 1  # would have gone negative
+        except Exception as e:  # anything else (e.g. "database is locked") fails the test
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    ops = THREADS * OPS_PER_THREAD
+    print(f"\n{ops} add_balance calls from {THREADS} threads in {elapsed:.2f}s ({ops / elapsed:,.0f} ops/s), "
+          f"{sum(rejected)} rejected debits")
+
+    assert errors == []
+    users, ledger_sums, _ = balances(ledger)
+    for uid, balance in users.items():
+        assert balance == ledger_sums.get(uid, 0)
+        assert balance >= 0
+    assert sum(users.values()) == sum(applied)
+    with ledger.db_connection() as conn:
+        entries = conn.execute("SELECT COUNT(*) FROM balance_ledger").fetchone()[0]
+    assert entries == ops - sum(rejected)
+
+
+def test_rejected_debit_leaves_no_ledger_row(ledger):
+    ledger.add_balance(1, 100, "deposit")
+    with pytest.raises(ValueError):
+        ledger.add_balance(1, -101, "too much")
+    with pytest.raises(ValueError):
+        ledger.add_balance(999, 10, "no such user")
+    users, ledger_sums, _ = balances(ledger)
+    assert users[1] == ledger_sums[1] == 100
+    assert 999 not in ledger_sums
+
+
+def test_compaction_keeps_snapshot_plus_ledger_equal_to_balance(ledger):
+    for amount in (100, -30, 45):
+        ledger.add_balance(1, amount, "x")
+    ledger.add_balance(2, 7, "x")
+    assert ledger.compact_balance_ledger(keep_days=-1) == 4
+    ledger.add_balance(1, -15, "after")
+    users, ledger_sums, snapshots = balances(ledger)
+    assert snapshots == {1: 115, 2: 7}
+    assert users[1] == snapshots[1] + ledger_sums[1] == 100
+    assert users[2] == snapshots[2] == 7
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def users(bot):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.commit()
+    return bot
+
+
+def test_lookups_normalize_phone_and_username(users):
+    users.add_user(1, "Alice", phone="+998 90 123-45-67")
+    users.add_user(2, "bob")
+    assert users.find_user_by_phone("998901234567")[:3] == (1, "Alice", "+998 90 123-45-67")
+    assert users.find_user_by_username("@ALICE")[0] == 1
+    assert users.find_user_by_username("bob")[0] == 2
+    assert users.find_user_by_phone("+998 90 000 00 00") is None
+    assert users.find_user_by_username("") is None
+
+
+def test_backfill_fills_rows_written_without_an_index(users):
+    with users.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, username, phone) VALUES (?, ?, ?)",
+            [(uid, users.encrypt_data(f"user{uid}"), users.encrypt_data(f"+{uid}")) for uid in range(1, 8)],
+        )
+        conn.commit()
+    assert users.find_user_by_username("user5") is None
+    assert [row[0] for row in users.get_unindexed_users(0, batch_size=3)] == [1, 2, 3]
+    asyncio.run(users.backfill_blind_indexes(batch_size=3))
+    assert users.get_unindexed_users(0) == []
+    assert [users.find_user_by_phone(f"{uid}")[0] for uid in range(1, 8)] == list(range(1, 8))
+    assert users.find_user_by_username("USER7")[0] == 7
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError, TelegramServerError
+from aiogram.methods import SendMessage
+
+ADMIN_CHAT = 555
+RECIPIENTS = list(range(9001, 9009))
+
+
+def error(cls, user_id):
+    return cls(SendMessage(chat_id=user_id, text="x"), "fake")
+
+
+class FakeBot:
+    """Stands in for aiogram's Bot: records deliveries, raises the scripted errors."""
+
+    def __init__(self, errors=None, outage_from=None, hang_at=None):
+        self.errors = errors or {}  # user_id -> exceptions raised on successive attempts
+        self.outage_from = outage_from  # every user_id >= this gets a network error
+        self.hang_at = hang_at  # user_id whose send never returns (the process "dies" there)
+        self.reached_hang = asyncio.Event()
+        self.delivered = []
+        self.admin_messages = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        if chat_id == ADMIN_CHAT:
+            self.admin_messages.append((text, reply_markup))
+            return
+        if chat_id == self.hang_at:
+            self.reached_hang.set()
+            await asyncio.Event().wait()
+        if self.outage_from is not None and chat_id >= self.outage_from:
+            raise error(TelegramNetworkError, chat_id)
+        if self.errors.get(chat_id):
+            raise self.errors[chat_id].pop(0)
+        self.delivered.append(chat_id)
+
+    async def edit_message_text(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def broadcast(bot, monkeypatch):
+    monkeypatch.setattr(bot, "BROADCAST_RETRY_BACKOFF", 0)
+    with bot.db_connection() as conn:
+        conn.execute("UPDATE broadcasts SET status = 'done' WHERE status IN ('running', 'paused')")
+        conn.commit()
+    for uid in RECIPIENTS:
+        bot.add_user(uid, f"bc_{uid}", country="ZZ")
+    broadcast_id, total = bot.create_broadcast("salom", {"country": "ZZ"}, ADMIN_CHAT)
+    assert total == len(RECIPIENTS)
+    return broadcast_id
+
+
+def status(bot, broadcast_id):
+    row = bot.get_broadcast(broadcast_id)
+    return row[3], row[6], row[7]  # status, sent, failed
+
+
+def test_per_recipient_errors(bot, broadcast):
+    a, b, c, d = RECIPIENTS[1:5]
+    fake = FakeBot(errors={
+        a: [error(TelegramForbiddenError, a)],  # blocked the bot: no retry
+        b: [error(TelegramNetworkError, b), error(TelegramServerError, b)],  # recovers on the third try
+        c: [error(TelegramServerError, c)] * 3,  # keeps failing
+        d: [error(TelegramNetworkError, d)],
+    })
+    asyncio.run(bot.BroadcastEngine(fake, rate=1000)._run(broadcast))
+
+    assert sorted(fake.delivered) == sorted(set(RECIPIENTS) - {a, c})
+    assert status(bot, broadcast) == ("done", len(RECIPIENTS) - 2, 2)
+    assert fake.admin_messages == []
+
+
+def test_outage_pauses_and_resumes(bot, broadcast, monkeypatch):
+    monkeypatch.setattr(bot, "BROADCAST_MAX_ERRORS_IN_ROW", 2)
+    outage_from = RECIPIENTS[3]
+    first = FakeBot(outage_from=outage_from)
+    asyncio.run(bot.BroadcastEngine(first, rate=1000)._run(broadcast))
+
+    assert first.delivered == RECIPIENTS[:3]
+    state, sent, failed = status(bot, broadcast)
+    assert (state, sent) == ("paused", 3)
+    assert failed == 1  # the first failing recipient; the one that tripped the pause is retried
+    assert len(first.admin_messages) == 1
+    text, kb = first.admin_messages[0]
+    assert f"#{broadcast}" in text
+    assert kb.inline_keyboard[0][0].callback_data == f"admin_broadcast_resume_{broadcast}"
+    # Paused broadcasts are not picked up as running
+    assert broadcast not in bot.get_running_broadcast_ids()
+
+    assert bot.resume_broadcast(broadcast) is True
+    second = FakeBot()
+    asyncio.run(bot.BroadcastEngine(second, rate=1000)._run(broadcast))
+
+    assert second.delivered == RECIPIENTS[4:]
+    assert status(bot, broadcast) == ("done", len(RECIPIENTS) - 1, 1)
+    assert bot.resume_broadcast(broadcast) is False
+
+
+def test_resume_after_crash_sends_each_message_once(bot, broadcast):
+    hang_at = RECIPIENTS[5]
+    first = FakeBot(hang_at=hang_at)
+
+    async def crash():
+        engine = bot.BroadcastEngine(first, rate=1000)
+        engine.start(broadcast)
+        await first.reached_hang.wait()
+        await engine.stop()  # what a shutdown or crash leaves behind: status still 'running'
+
+    asyncio.run(crash())
+    assert status(bot, broadcast)[0] == "running"
+
+    second = FakeBot()
+
+    async def restart():
+        engine = bot.BroadcastEngine(second, rate=1000)
+        await engine.resume_all()
+        await asyncio.gather(*engine._tasks.values())
+
+    asyncio.run(restart())
+
+    assert first.delivered == RECIPIENTS[:5]
+    assert second.delivered == RECIPIENTS[5:]
+    assert status(bot, broadcast) == ("done", len(RECIPIENTS), 0)
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from callback_router import CallbackRouteMiddleware, CallbackRouter, LatencyHistogram
+
+
+def make_router():
+    router = CallbackRouter()
+
+    @router.route("admin_approve_all", admin=True)
+    async def approve_all(query, state, ctx):
+        return "all"
+
+    @router.route(prefix="admin_approve_", admin=True, payload=int)
+    async def approve(query, state, ctx):
+        return ("one", ctx.payload)
+
+    @router.route(prefix="admin_")
+    async def admin_other(query, state, ctx):
+        return "other"
+
+    @router.route("balance", "bal")
+    async def balance(query, state, ctx):
+        return "balance"
+
+    return router
+
+
+def test_exact_beats_prefix_and_longest_prefix_wins():
+    router = make_router()
+    assert router.resolve("admin_approve_all")[0].name == "approve_all"
+    route, rest = router.resolve("admin_approve_42")
+    assert (route.name, rest) == ("approve", "42")
+    assert router.resolve("admin_stats")[0].name == "admin_other"
+    assert router.resolve("bal")[0] is router.resolve("balance")[0]
+    assert router.resolve("balanc") == (None, "balanc")
+    assert router.resolve("") == (None, "")
+
+
+def test_duplicate_routes_are_rejected():
+    router = make_router()
+    with pytest.raises(ValueError):
+        router.route("balance")(lambda *a: None)
+    with pytest.raises(ValueError):
+        router.route(prefix="admin_")(lambda *a: None)
+
+
+def test_histogram_buckets_and_quantiles():
+    h = LatencyHistogram(bounds=(10, 100))
+    for ms in (1, 2, 3, 50, 500):
+        h.observe(ms)
+    assert h.counts == [3, 1, 1]
+    assert (h.quantile(0.5), h.quantile(0.8), h.quantile(1.0)) == (10.0, 100.0, 500.0)
+    assert LatencyHistogram().quantile(0.5) == 0.0
+
+
+def run_middleware(router, data, admin):
+    denied = []
+
+    async def on_denied(event):
+        denied.append(event.data)
+
+    async def handler(event, data):
+        ctx = data["callback_ctx"]
+        if ctx.route is None:
+            return None
+        return await ctx.route.handler(event, None, ctx)
+
+    middleware = CallbackRouteMiddleware(router, lambda user: admin, on_denied)
+    event = SimpleNamespace(data=data, from_user=SimpleNamespace(username="u"))
+    return asyncio.run(middleware(handler, event, {})), denied
+
+
+def test_middleware_gates_admin_routes_and_parses_payloads():
+    router = make_router()
+    assert run_middleware(router, "admin_approve_7", admin=True) == (("one", 7), [])
+    assert run_middleware(router, "admin_approve_7", admin=False) == (None, ["admin_approve_7"])
+    assert run_middleware(router, "admin_approve_x", admin=True) == (None, [])  # bad payload: unmatched
+    assert run_middleware(router, "balance", admin=False) == ("balance", [])
+    assert router.latency["approve"].total == 1
+    assert router.latency["balance"].total == 1
+    assert router.latency["<unmatched>"].total == 1
+
+
+def test_every_bot_button_resolves_to_a_route(bot):
+    keys = ["back_to_main", "help", "tasks", "balance", "referral", "stats", "subscribe", "post_ad", "pay",
+            "pay_method_click", "add_instagram", "admin_panel", "admin_stats", "admin_users_next_5",
+            "admin_payments", "admin_payments_prev_9", "admin_approve_all", "admin_approve_12_3_100"]
+    for key in keys:
+        route, _ = bot.callbacks.resolve(key)
+        assert route is not None, key
+    assert bot.callbacks.resolve("admin_approve_all")[0].name != bot.callbacks.resolve("admin_approve_1")[0].name
@@ -0,0 +1,72 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def cache(bot, monkeypatch):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM mandatory_channels")
+        conn.execute("DELETE FROM reklama_groups")
+        conn.commit()
+    now = [1000.0]
+    monkeypatch.setattr(bot.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(bot, "config_cache", bot.ConfigCache())
+    bot.config_cache.load()
+    statements = []
+    with bot.db_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    yield bot, now, statements
+    with bot.db_connection() as conn:
+        conn.set_trace_callback(None)
+
+
+def selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def external_write(bot, sql, params):
+    # Another process editing the tables: a separate connection to the same file
+    other = sqlite3.connect(bot.DB_FILE)
+    try:
+        other.execute(sql, params)
+        other.commit()
+    finally:
+        other.close()
+
+
+def test_repeated_reads_within_the_interval_run_no_query(cache):
+    bot, now, statements = cache
+    for _ in range(1000):
+        assert bot.get_mandatory_channels() == []
+        assert bot.get_reklama_groups() == []
+        now[0] += bot.CONFIG_VERSION_CHECK_INTERVAL / 10000
+    assert statements == []
+
+
+def test_own_writes_update_the_snapshot_without_reloading(cache):
+    bot, now, statements = cache
+    bot.add_mandatory_channel("@one")
+    bot.add_reklama_group("-100")
+    assert bot.get_mandatory_channels() == ["@one"]
+    assert bot.get_reklama_groups() == ["-100"]
+    bot.remove_mandatory_channel("@one")
+    assert bot.get_mandatory_channels() == []
+    assert selects(statements) == []
+
+
+def test_external_write_makes_the_next_read_reload(cache):
+    bot, now, statements = cache
+    external_write(bot, "INSERT INTO mandatory_channels (channel) VALUES (?)", ("@other",))
+    assert bot.get_mandatory_channels() == []  # still inside the check interval
+    assert statements == []
+
+    now[0] += bot.CONFIG_VERSION_CHECK_INTERVAL
+    assert bot.get_mandatory_channels() == ["@other"]
+    assert [s for s in statements if "data_version" in s]
+    assert any("FROM mandatory_channels" in s for s in selects(statements))
+
+    statements.clear()
+    now[0] += bot.CONFIG_VERSION_CHECK_INTERVAL
+    assert bot.get_mandatory_channels() == ["@other"]
+    assert selects(statements) == []  # unchanged data_version: probe only
@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from cryptography.fernet import Fernet
+
+from crypto_pool import CryptoPool, LRUCache
+
+
+@pytest.fixture
+def pool():
+    pool = CryptoPool(Fernet.generate_key(), workers=2, parallel_threshold=50, chunk_size=20, cache_size=100)
+    yield pool
+    pool.shutdown()
+
+
+def test_inline_round_trip_keeps_empty_values_empty(pool):
+    values = ["a", None, "", "+998901234567", 42]
+    tokens = pool.encrypt_many(values)
+    assert tokens[1] is None and tokens[2] is None
+    assert pool.decrypt_many(tokens) == ["a", None, None, "+998901234567", "42"]
+    assert pool._pool is None  # below the threshold nothing is spawned
+
+
+def test_large_batches_run_on_spawned_workers(pool):
+    values = [f"user{i}" for i in range(500)]
+    tokens = pool.encrypt_many(values)
+    assert pool._pool is not None
+    assert pool._pool._mp_context.get_start_method() == "spawn"
+    assert pool.decrypt_many(tokens, use_cache=False) == values
+    assert asyncio.run(pool.decrypt_many_async(tokens, use_cache=False)) == values
+    assert Fernet(pool.key).decrypt(tokens[0].encode()) == b"user0"
+
+
+def test_bad_tokens_come_back_as_none(pool):
+    other = CryptoPool(Fernet.generate_key()).encrypt_many(["x"])[0]
+    tokens = pool.encrypt_many(["a"] * 60) + ["garbage", other]
+    out = pool.decrypt_many(tokens, use_cache=False)
+    assert out[:60] == ["a"] * 60 and out[60:] == [None, None]
+
+
+def test_cache_serves_repeats_and_stays_bounded(pool):
+    tokens = pool.encrypt_many([f"v{i}" for i in range(150)])
+    pool.decrypt_many(tokens)
+    assert len(pool.cache) == 100
+    pool.cipher = None  # a cache hit must not need the cipher
+    assert pool.decrypt_many(tokens[-100:]) == [f"v{i}" for i in range(50, 150)]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert LRUCache(0).get("a") is None
@@ -0,0 +1,131 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from db_pool import DBExecutor, get_pool
+
+THREADS = 8
+WRITES_PER_THREAD = 200
+EXECUTOR_WRITES = 500
+SLOW_QUERY_MS = 300
+
+
+def test_concurrent_checkouts_and_writes(tmp_path):
+    db_file = str(tmp_path / "stress.db")
+    with get_pool(db_file).connection() as conn:
+        conn.execute("CREATE TABLE events (source TEXT, n INTEGER)")
+
+    pools, conns, errors = set(), set(), []
+    start = threading.Barrier(THREADS + 1)
+    executor = DBExecutor()
+
+    def insert(source, n):
+        with get_pool(db_file).connection() as conn:
+            conn.execute("INSERT INTO events VALUES (?, ?)", (source, n))
+            conn.commit()
+
+    def worker(i):
+        try:
+            start.wait()
+            for n in range(WRITES_PER_THREAD):
+                pool = get_pool(db_file)
+                pools.add(id(pool))
+                conns.add(id(pool.checkout()))
+                insert(f"thread-{i}", n)
+                if n % 20 == 0:
+                    with pool.connection() as conn:
+                        conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        except sqlite3.Error as e:
+            errors.append(e)
+
+    async def executor_writes():
+        insert_async = executor.wrap(insert)
+        start.wait()
+        await asyncio.gather(*(insert_async("executor", n) for n in range(EXECUTOR_WRITES)))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    try:
+        asyncio.run(executor_writes())  # a sqlite3 error here fails the test too
+    finally:
+        for t in threads:
+            t.join()
+        executor.shutdown()
+
+    assert errors == []  # no "database is locked"
+    assert len(pools) == 1
+    assert len(conns) == THREADS  # one long-lived connection per thread
+
+    pool = get_pool(db_file)
+    with pool.connection() as conn:
+        rows = conn.execute("SELECT source, COUNT(DISTINCT n) FROM events GROUP BY source").fetchall()
+    pool.close_all()
+    counts = dict(rows)
+    assert counts.pop("executor") == EXECUTOR_WRITES
+    assert counts == {f"thread-{i}": WRITES_PER_THREAD for i in range(THREADS)}
+
+
+def test_connection_rolls_back_on_error(tmp_path):
+    pool = get_pool(str(tmp_path / "rollback.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+    try:
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t VALUES (1)")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+    pool.close_all()
+
+
+def slow_query(db_file, ms):
+    # sqlite3 calls back into Python for sleep_ms(), so the query itself holds the thread
+    with get_pool(db_file).connection() as conn:
+        conn.create_function("sleep_ms", 1, lambda n: time.sleep(n / 1000) or n)
+        return conn.execute("SELECT sleep_ms(?)", (ms,)).fetchone()[0]
+
+
+async def max_loop_lag(work, tick=0.005):
+    """Run ``work`` while a handler-like coroutine ticks every ``tick`` seconds; return its worst lateness."""
+    lags, done = [], False
+
+    async def handler():
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - before - tick)
+
+    ticker = asyncio.create_task(handler())
+    await asyncio.sleep(tick)
+    await work()
+    done = True
+    await ticker
+    return max(lags)
+
+
+def test_slow_query_on_executor_does_not_block_the_loop(tmp_path):
+    db_file = str(tmp_path / "slow.db")
+    executor = DBExecutor()
+    slow_query_async = executor.wrap(slow_query)
+
+    async def inline():
+        slow_query(db_file, SLOW_QUERY_MS)
+
+    async def offloaded():
+        assert await slow_query_async(db_file, SLOW_QUERY_MS) == SLOW_QUERY_MS
+
+    try:
+        inline_lag = asyncio.run(max_loop_lag(inline))
+        offloaded_lag = asyncio.run(max_loop_lag(offloaded))
+    finally:
+        executor.shutdown()
+        get_pool(db_file).close_all()
+
+    # Called inline, the query stalls every other coroutine for its whole duration
+    assert inline_lag >= SLOW_QUERY_MS / 1000 * 0.9
+    # On the DB thread, an unrelated handler keeps running on time
+    assert offloaded_lag < 0.02
@@ -0,0 +1,42 @@
+import pytest
+
+
+@pytest.fixture
+def blacklist(bot500, monkeypatch):
+    bl = bot500.DomainBlacklist(["badsite.com", "spam.example"])
+    monkeypatch.setattr(bot500, "domain_blacklist", bl)
+    return bl
+
+
+@pytest.mark.parametrize("url, host", [
+    ("https://badsite.com", "badsite.com"),
+    ("badsite.com,", "badsite.com"),
+    ("https://badsite.com!", "badsite.com"),
+    ("(badsite.com)", "badsite.com"),
+    ("<https://badsite.com/path>", "badsite.com"),
+    ("\"www.badsite.com\".", "www.badsite.com"),
+    ("https://badsite.com!/x?y=1", "badsite.com"),
+    ("[https://Sub.BadSite.com];", "sub.badsite.com"),
+])
+def test_extract_host_strips_surrounding_punctuation(bot500, url, host):
+    assert bot500.extract_host(url) == host
+
+
+@pytest.mark.parametrize("text", [
+    "see https://badsite.com, it's great",
+    "visit https://badsite.com!",
+    "link (https://badsite.com) here",
+    "www.badsite.com.",
+    "https://x.badsite.com/path?)",
+])
+def test_blacklisted_domain_found_next_to_punctuation(bot500, blacklist, text):
+    assert bot500.contains_blacklisted_domain(text) == "badsite.com"
+
+
+@pytest.mark.parametrize("text", [
+    "https://notbadsite.com, hi",
+    "https://badsite.com.example!",
+    "no links at all.",
+])
+def test_other_domains_not_matched(bot500, blacklist, text):
+    assert bot500.contains_blacklisted_domain(text) is None
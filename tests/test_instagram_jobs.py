@@ -0,0 +1,53 @@
+import asyncio
+
+
+def job_status(bot, job_id):
+    with bot.db_connection() as conn:
+        return conn.execute("SELECT status, last_error FROM instagram_jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+
+def run_job(bot, monkeypatch, user_id, target):
+    async def followed(target_account):
+        return {"status": "success"}
+
+    notified = []
+
+    async def notify(self, uid, text):
+        notified.append(uid)
+
+    monkeypatch.setattr(bot, "add_instagram_follower", followed)
+    monkeypatch.setattr(bot.InstagramJobRunner, "_notify", notify)
+    job_id = bot.enqueue_instagram_job(user_id, target)
+    job = bot.claim_instagram_job()
+    assert job[0] == job_id
+    asyncio.run(bot.InstagramJobRunner(workers=0)._run(*job))
+    return job_id, notified
+
+
+def test_completed_job_is_rewarded_once(bot, monkeypatch):
+    bot.add_user(7001, "ig_user")
+    before = bot.get_balance(7001)
+    job_id, notified = run_job(bot, monkeypatch, 7001, "some_account")
+
+    assert job_status(bot, job_id) == ("done", None)
+    assert bot.get_balance(7001) == before + bot.INSTAGRAM_REWARD
+    assert notified == [7001]
+    # A second completion of the same job credits nothing
+    assert bot.complete_instagram_job(job_id, 7001) is False
+    assert bot.get_balance(7001) == before + bot.INSTAGRAM_REWARD
+
+
+def test_job_without_user_is_closed_and_not_requeued(bot, monkeypatch):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users WHERE user_id = 7002")
+        conn.commit()
+    job_id, notified = run_job(bot, monkeypatch, 7002, "other_account")
+
+    status, error = job_status(bot, job_id)
+    assert status == "done"
+    assert "not found" in error
+    assert notified == []
+    # A restart must not pick the job up and follow the account again
+    bot.requeue_stale_instagram_jobs()
+    assert job_status(bot, job_id)[0] == "done"
+    assert bot.claim_instagram_job() is None
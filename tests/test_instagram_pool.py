@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from instagrapi.exceptions import LoginRequired, PleaseWaitFewMinutes
+
+import instagram_pool
+from instagram_pool import InstagramClientPool
+
+
+class FakeClient:
+    """Stands in for instagrapi.Client: records logins, lookups and follows."""
+
+    instances = []
+
+    def __init__(self, **proxy):
+        self.settings = {}
+        self.logins = 0
+        self.loaded = None
+        self.lookups = []
+        self.follows = []
+        self.fail_next = []  # exceptions raised by the next user_follow calls
+        FakeClient.instances.append(self)
+
+    def load_settings(self, path):
+        with open(path) as f:
+            self.settings = json.load(f)
+        self.loaded = path
+
+    def dump_settings(self, path):
+        with open(path, "w") as f:
+            json.dump(self.settings, f)
+
+    def login(self, username, password):
+        self.logins += 1
+        self.settings.setdefault("cookie", f"session-{username}")
+        self.username = username
+
+    def user_id_from_username(self, username):
+        self.lookups.append(username)
+        return f"id-{username}"
+
+    def user_follow(self, user_id):
+        if self.fail_next:
+            raise self.fail_next.pop(0)
+        self.follows.append(user_id)
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    FakeClient.instances = []
+
+
+def make_pool(tmp_path, accounts=(("alice", "pw"),), **kwargs):
+    return InstagramClientPool(accounts, sessions_dir=str(tmp_path / "sessions"), min_interval=0,
+                               client_factory=FakeClient, **kwargs)
+
+
+def test_session_is_saved_and_reused_across_restarts(tmp_path):
+    async def follow_once():
+        pool = make_pool(tmp_path)
+        await pool.follow("@target")
+        pool.close()
+
+    asyncio.run(follow_once())
+    path = tmp_path / "sessions" / "alice.json"
+    assert json.loads(path.read_text()) == {"cookie": "session-alice"}
+    first = FakeClient.instances[0]
+    assert first.loaded is None
+
+    asyncio.run(follow_once())
+    second = FakeClient.instances[1]
+    assert second.loaded == str(path)
+    assert second.settings == {"cookie": "session-alice"}
+
+
+def test_client_is_logged_in_once_per_account(tmp_path):
+    async def run():
+        pool = make_pool(tmp_path, accounts=(("alice", "pw"), ("bob", "pw")))
+        await asyncio.gather(*(pool.follow(f"user{i}") for i in range(6)))
+        pool.close()
+
+    asyncio.run(run())
+    assert sorted(c.username for c in FakeClient.instances) == ["alice", "bob"]
+    assert [c.logins for c in FakeClient.instances] == [1, 1]
+    assert sum(len(c.follows) for c in FakeClient.instances) == 6
+
+
+def test_user_id_lookups_are_cached_with_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(instagram_pool, "USER_ID_CACHE_SIZE", 2)
+
+    async def run():
+        pool = make_pool(tmp_path)
+        for target in ("@A", "a", "b", "a", "c", "b"):
+            await pool.follow(target)
+        pool.close()
+
+    asyncio.run(run())
+    client = FakeClient.instances[0]
+    # "a" hit twice; "b" was evicted by "c" because "a" was used more recently
+    assert client.lookups == ["a", "b", "c", "b"]
+    assert client.follows == ["id-a", "id-a", "id-b", "id-a", "id-c", "id-b"]
+
+
+def test_please_wait_puts_the_account_on_cooldown(tmp_path):
+    async def run():
+        pool = make_pool(tmp_path, accounts=(("alice", "pw"), ("bob", "pw")))
+        await pool.follow("warmup")  # alice logs in first
+        alice = FakeClient.instances[0]
+        alice.fail_next.append(PleaseWaitFewMinutes("please wait"))
+        await pool.follow("x")  # bob, alice is back in the queue behind him
+        with pytest.raises(PleaseWaitFewMinutes):
+            await pool.follow("y")  # alice again, throttled
+        throttled_until = pool._accounts[0].next_allowed
+        before = time.perf_counter()
+        await pool.follow("z")  # served by bob without waiting for alice
+        waited = time.perf_counter() - before
+        pool.close()
+        return throttled_until, waited
+
+    throttled_until, waited = asyncio.run(run())
+    assert throttled_until - time.monotonic() > instagram_pool.COOLDOWN_ON_PLEASE_WAIT - 5
+    assert waited < 1
+    bob = FakeClient.instances[1]
+    assert bob.follows == ["id-x", "id-z"]
+
+
+def test_expired_session_logs_in_again_once(tmp_path):
+    async def run():
+        pool = make_pool(tmp_path)
+        await pool.follow("a")
+        FakeClient.instances[0].fail_next.append(LoginRequired("expired"))
+        await pool.follow("b")
+        pool.close()
+
+    asyncio.run(run())
+    assert len(FakeClient.instances) == 2
+    assert FakeClient.instances[1].follows == ["id-b"]
+    assert os.path.exists(tmp_path / "sessions" / "alice.json")
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import EditMessageText, SendMessage
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from keyboard_cache import CachedMarkupSession
+
+
+def fields(form):
+    return [(options["name"], value) for options, _, value in form._fields]
+
+
+@pytest.fixture
+def sessions(bot):
+    async def make():
+        return AiohttpSession(), bot.bot.session
+
+    return asyncio.run(make())
+
+
+def test_cached_keyboards_render_like_the_stock_session(bot, sessions):
+    stock, cached = sessions
+    assert isinstance(cached, CachedMarkupSession)
+    assert len(bot.keyboards) >= 8
+    for key, markup in bot.keyboards._markups.items():
+        methods = [SendMessage(chat_id=1, text="x", reply_markup=markup)]
+        if isinstance(markup, InlineKeyboardMarkup):
+            methods.append(EditMessageText(chat_id=1, message_id=2, text="x", reply_markup=markup))
+        for method in methods:
+            assert fields(cached.build_form_data(bot.bot, method)) == fields(stock.build_form_data(bot.bot, method)), key
+
+
+def test_uncached_and_copied_markups_take_the_normal_path(bot, sessions):
+    stock, cached = sessions
+    fresh = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="a", callback_data="a")]])
+    copy = bot.main_menu(True).model_copy()
+    assert bot.keyboards.rendered(fresh) is None and bot.keyboards.rendered(copy) is None
+    method = SendMessage(chat_id=1, text="x", reply_markup=fresh)
+    assert fields(cached.build_form_data(bot.bot, method)) == fields(stock.build_form_data(bot.bot, method))
+
+
+def test_accessors_return_the_same_shared_objects(bot):
+    assert bot.main_menu(True) is bot.main_menu(1)
+    assert bot.main_menu(False) is not bot.main_menu(True)
+    assert bot.back_kb("admin_panel").inline_keyboard[0][0].callback_data == "admin_panel"
+    with pytest.raises(ValueError):
+        bot.keyboards.register("menu_button", bot.menu_button())
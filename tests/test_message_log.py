@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+
+def logged(bot500, chat_id):
+    with bot500.db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM logs WHERE chat_id = ?", (chat_id,)).fetchone()[0]
+
+
+def test_burst_is_written_in_batches_and_drained_on_stop(bot500, monkeypatch):
+    batches = []
+    write = bot500.log_messages
+
+    def recording(rows):
+        batches.append(len(rows))
+        write(rows)
+
+    monkeypatch.setattr(bot500, "log_messages_async", bot500.db_executor.wrap(recording))
+    writer = bot500.MessageLogWriter(batch_size=200, flush_interval=0.05)
+
+    async def burst():
+        writer.start()
+        for i in range(1000):
+            writer.log(i, "u", -1001, f"msg {i}")
+        await writer.stop()
+
+    asyncio.run(burst())
+    assert logged(bot500, -1001) == 1000
+    assert (writer.written, writer.dropped) == (1000, 0)
+    assert sum(batches) == 1000 and max(batches) <= 200 and len(batches) <= 6
+
+
+def test_full_queue_drops_instead_of_blocking(bot500):
+    writer = bot500.MessageLogWriter(max_queue=10)
+
+    async def flood():
+        writer.start()
+        for i in range(50):  # no await: the writer task can't run in between
+            writer.log(i, "u", -1002, "spam")
+        await writer.stop()
+
+    asyncio.run(flood())
+    assert (writer.written, writer.dropped) == (10, 40)
+    assert logged(bot500, -1002) == 10
+
+
+def test_rows_before_start_go_to_the_db_thread(bot500, monkeypatch):
+    threads = []
+    write = bot500.log_messages
+
+    def recording(rows):
+        threads.append(threading.current_thread())
+        write(rows)
+
+    monkeypatch.setattr(bot500, "log_messages", recording)
+    writer = bot500.MessageLogWriter()
+    writer.log(1, "u", -1003, "early")
+    bot500.db_executor.submit(lambda: None).result()  # single DB thread: runs after the row
+    assert threads and threads[0] is not threading.main_thread()
+    assert logged(bot500, -1003) == 1
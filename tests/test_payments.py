@@ -0,0 +1,65 @@
+import pytest
+
+
+@pytest.fixture
+def payments(bot):
+    with bot.db_connection() as conn:
+        for table in ("users", "payments", "user_ads", "balance_ledger", "balance_snapshots"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM counters WHERE name = 'pending_payments'")
+        conn.commit()
+    bot.add_user(1, "payer")
+    return bot
+
+
+def pending(module, user_id, amount):
+    module.process_payment(user_id, amount, "click")
+    with module.db_connection() as conn:
+        return conn.execute("SELECT MAX(payment_id) FROM payments").fetchone()[0]
+
+
+def statuses(module):
+    with module.db_connection() as conn:
+        return dict(conn.execute("SELECT payment_id, status FROM payments"))
+
+
+def test_approval_is_idempotent(payments):
+    pid = pending(payments, 1, 100)
+    assert payments.approve_payment(pid) == (1, 100)
+    assert payments.approve_payment(pid) is None
+    assert payments.get_balance(1) == 100
+
+
+def test_failing_payments_do_not_block_the_ones_behind_them(payments):
+    bad = [pending(payments, 404, 10) for _ in range(3)]  # user 404 does not exist
+    good = [pending(payments, 1, 5) for _ in range(4)]
+
+    approved, failed = payments.approve_all_pending(limit=2)
+    assert sorted(approved) == good[:2] and failed == bad
+    approved, failed = payments.approve_all_pending(limit=2)
+    assert sorted(approved) == good[2:] and failed == bad
+    assert payments.approve_all_pending(limit=2) == ({}, bad)
+
+    assert [statuses(payments)[pid] for pid in bad] == ["pending"] * 3
+    assert payments.get_balance(1) == 20
+
+
+def test_pending_pages_and_counter(payments):
+    ids = [pending(payments, 1, n) for n in range(1, 8)]
+    assert payments.count_pending_payments() == 7
+    payments.approve_payment(ids[3])
+    assert payments.count_pending_payments() == 6
+    rest = ids[:3] + ids[4:]
+
+    first, has_prev, has_next = payments.list_pending_payments_page(limit=4)
+    assert [r[0] for r in first] == rest[:4] and (has_prev, has_next) == (False, True)
+    second, has_prev, has_next = payments.list_pending_payments_page(after_id=first[-1][0], limit=4)
+    assert [r[0] for r in second] == rest[4:] and (has_prev, has_next) == (True, False)
+    back, has_prev, has_next = payments.list_pending_payments_page(before_id=second[0][0], limit=4)
+    assert back == first and (has_prev, has_next) == (False, True)
+
+
+def test_count_user_ads(payments):
+    for n in range(3):
+        payments.record_ad(1, f"ad {n}")
+    assert payments.count_user_ads() == 3
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+
+class FakeBot:
+    """Records bans; each one takes ``delay`` seconds like a real API call."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.banned = []
+
+    async def ban_chat_member(self, chat_id, user_id):
+        await asyncio.sleep(self.delay)
+        self.banned.append((chat_id, user_id))
+
+
+@pytest.fixture
+def restore(bot500, monkeypatch):
+    with bot500.db_connection() as conn:
+        conn.execute("DELETE FROM pending_state")
+        conn.execute("DELETE FROM users")
+        conn.commit()
+    bot500.pending_verification.clear()
+    bot500.pending_field.clear()
+    monkeypatch.setattr(bot500, "verification_scheduler", bot500.VerificationScheduler(bot500.expire_verifications))
+    monkeypatch.setattr(bot500, "send_admin_log", lambda *args, **kwargs: None)
+    return bot500
+
+
+def add_pending(module, user_id, deadline, group_id=-100):
+    with module.db_connection() as conn:
+        conn.execute(
+            "INSERT INTO pending_state (user_id, group_id, chat_title, joined_at, deadline) VALUES (?, ?, 'g', NULL, ?)",
+            (user_id, group_id, deadline),
+        )
+        conn.commit()
+
+
+def pending_ids(module):
+    with module.db_connection() as conn:
+        return {row[0] for row in conn.execute("SELECT user_id FROM pending_state")}
+
+
+def test_startup_does_not_wait_for_backlog_bans(restore, monkeypatch):
+    now = time.time()
+    for uid in range(1, 51):
+        add_pending(restore, uid, now - 60)
+    add_pending(restore, 1000, now + 600)
+    # Verified while the bot was down: swept without a ban
+    add_pending(restore, 2000, now - 60)
+    with restore.db_connection() as conn:
+        conn.execute("INSERT INTO users (user_id, verified) VALUES (2000, 1)")
+        conn.commit()
+
+    fake = FakeBot(delay=0.05)
+    executor = restore.ExpiryExecutor(fake, rate=1000, concurrency=1, summary_window=0)
+    monkeypatch.setattr(restore, "expiry_executor", executor)
+
+    async def scenario():
+        started = time.perf_counter()
+        await restore.restore_pending_state()
+        elapsed = time.perf_counter() - started
+        # 50 bans at 50 ms each, one at a time, would take 2.5 s
+        assert elapsed < 1.0
+        assert set(restore.pending_verification) == {1000}
+        assert len(restore.verification_scheduler) == 1
+        assert len(fake.banned) < 50
+        await executor._backlog_task
+        await executor.stop()
+
+    asyncio.run(scenario())
+
+    assert sorted(uid for _, uid in fake.banned) == list(range(1, 51))
+    assert pending_ids(restore) == {1000}
+
+
+def test_interrupted_backlog_resumes_on_next_start(restore, monkeypatch):
+    now = time.time()
+    for uid in range(1, 21):
+        add_pending(restore, uid, now - 60)
+
+    async def first_run():
+        fake = FakeBot(delay=0.01)
+        executor = restore.ExpiryExecutor(fake, rate=1000, concurrency=1, summary_window=0)
+        monkeypatch.setattr(restore, "expiry_executor", executor)
+        executor.ban_backlog(await restore.sweep_expired_pending_async(time.time()), chunk=5)
+        while len(fake.banned) < 7:
+            await asyncio.sleep(0.005)
+        await executor.stop()
+        return fake
+
+    first = asyncio.run(first_run())
+    # Only finished chunks are cleared; the rest is still pending
+    left = pending_ids(restore)
+    assert left and left.isdisjoint(range(1, 6))
+
+    async def second_run():
+        fake = FakeBot()
+        executor = restore.ExpiryExecutor(fake, rate=1000, summary_window=0)
+        monkeypatch.setattr(restore, "expiry_executor", executor)
+        await restore.restore_pending_state()
+        await executor._backlog_task
+        await executor.stop()
+        return fake
+
+    second = asyncio.run(second_run())
+    banned = {uid for _, uid in first.banned} | {uid for _, uid in second.banned}
+    assert banned == set(range(1, 21))
+    assert pending_ids(restore) == set()
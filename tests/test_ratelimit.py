@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from ratelimit import TokenBucket, call_with_retry
+
+FLOOD_WAIT = 0.3
+
+
+class FloodingBot:
+    """Fake Bot whose send_message answers the first ``floods`` calls with a 429."""
+
+    def __init__(self, floods=0, retry_after=FLOOD_WAIT):
+        self.floods = floods
+        self.retry_after = retry_after
+        self.calls = []  # (chat_id, time.monotonic()) for every attempt
+
+    async def send_message(self, chat_id, text):
+        self.calls.append((chat_id, time.monotonic()))
+        if self.floods > 0:
+            self.floods -= 1
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), "Too Many Requests", self.retry_after)
+        return text
+
+
+def test_retry_after_is_retried_and_succeeds():
+    fake = FloodingBot(floods=2, retry_after=0.05)
+
+    async def scenario():
+        bucket = TokenBucket(100)
+        return await call_with_retry(bucket, lambda: fake.send_message(1, "hi"), attempts=3)
+
+    assert asyncio.run(scenario()) == "hi"
+    assert len(fake.calls) == 3
+
+
+def test_retry_count_is_respected():
+    fake = FloodingBot(floods=10, retry_after=0.05)
+
+    async def scenario():
+        bucket = TokenBucket(100)
+        await call_with_retry(bucket, lambda: fake.send_message(1, "hi"), attempts=2)
+
+    with pytest.raises(TelegramRetryAfter):
+        asyncio.run(scenario())
+    assert len(fake.calls) == 2
+
+
+def test_pause_holds_back_every_caller_of_the_bucket():
+    fake = FloodingBot(floods=1)
+
+    async def scenario():
+        bucket = TokenBucket(100)
+        flooded = asyncio.create_task(call_with_retry(bucket, lambda: fake.send_message(1, "a")))
+        await asyncio.sleep(0.01)  # let the first call hit the 429 and pause the bucket
+        paused_at = time.monotonic()
+        # Other chats never saw a 429 themselves but share the bucket
+        others = [call_with_retry(bucket, lambda cid=cid: fake.send_message(cid, "b")) for cid in range(2, 6)]
+        await asyncio.gather(flooded, *others)
+        return paused_at
+
+    paused_at = asyncio.run(scenario())
+    later = [t for chat_id, t in fake.calls[1:]]
+    assert len(later) == 5
+    # Nothing, including the retry, went out before the flood wait ended
+    assert min(later) >= paused_at + FLOOD_WAIT - 0.05
+
+
+def test_no_burst_after_pause():
+    async def scenario():
+        bucket = TokenBucket(10, capacity=1)
+        await bucket.acquire()
+        bucket.pause(0.2)
+        started = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # The pause must not bank tokens: 3 acquires at 10/s after a 0.2 s pause
+    assert asyncio.run(scenario()) >= 0.2 + 0.2 - 0.02
@@ -0,0 +1,107 @@
+import pytest
+
+
+@pytest.mark.parametrize("user_id", [1, 255, 256, 123456789, 2 ** 40 + 7])
+def test_payload_round_trip(bot, user_id):
+    payload = bot.encode_referral_payload(user_id)
+    assert len(payload) <= 64
+    assert bot.decode_referral_payload(payload) == user_id
+
+
+def test_tampered_payload_is_rejected(bot):
+    payload = bot.encode_referral_payload(123456789)
+    forged = payload[:-1] + ("A" if payload[-1] != "A" else "B")
+    assert bot.decode_referral_payload(forged) is None
+
+
+@pytest.mark.parametrize("payload", ["", "r", "r!!", "x" * 30, "²", "١٢٣", "12a"])
+def test_garbage_payload_is_rejected(bot, payload):
+    assert bot.decode_referral_payload(payload) is None
+
+
+def test_legacy_numeric_payload_needs_flag(bot, monkeypatch):
+    assert bot.decode_referral_payload("123456") is None
+    monkeypatch.setattr(bot, "REFERRAL_ACCEPT_LEGACY_IDS", True)
+    assert bot.decode_referral_payload("123456") == 123456
+    # Non-ASCII digits never reach int()
+    assert bot.decode_referral_payload("²") is None
+
+
+def balances(bot, *user_ids):
+    return [bot.get_balance(uid) for uid in user_ids]
+
+
+def test_referral_pays_each_level_once(bot, monkeypatch):
+    monkeypatch.setattr(bot, "REFERRAL_REWARDS", (5, 2, 1))
+    a, b, c, d = 8101, 8102, 8103, 8104
+    bot.add_user(a, "ref_a")
+    for new, referrer in ((b, a), (c, b), (d, c)):
+        bot.add_user(new, f"ref_{new}", referrer_id=referrer)
+        bot.process_referral(new, referrer)
+    before = balances(bot, a, b, c)
+
+    e = 8105
+    bot.add_user(e, "ref_e", referrer_id=d)
+    assert bot.process_referral(e, d) == [(d, 5), (c, 2), (b, 1)]
+    assert balances(bot, a, b, c) == [before[0], before[1] + 1, before[2] + 2]
+    assert bot.get_balance(d) == 5
+
+    # Repeating the referral, or claiming another referrer, pays nothing
+    assert bot.process_referral(e, d) == []
+    assert bot.process_referral(e, a) == []
+    assert bot.get_balance(d) == 5
+    assert balances(bot, a, b, c) == [before[0], before[1] + 1, before[2] + 2]
+
+
+def test_referral_cycle_stops_before_paying_the_user(bot):
+    n, p = 8201, 8202
+    bot.add_user(n, "cycle_n")
+    bot.add_user(p, "cycle_p")
+    # Legacy data: p already counts n as its referrer
+    with bot.db_connection() as conn:
+        conn.execute("INSERT INTO referrals (referred_id, referrer_id) VALUES (?, ?)", (p, n))
+        conn.commit()
+    assert bot.process_referral(n, p) == [(p, 5)]
+    assert bot.get_balance(n) == 0
+
+
+def edge(bot, referred_id):
+    with bot.db_connection() as conn:
+        return conn.execute("SELECT referrer_id FROM referrals WHERE referred_id = ?", (referred_id,)).fetchone()
+
+
+def test_backfill_runs_once(bot):
+    x, y, z, w = 8301, 8302, 8303, 8304
+    bot.add_user(x, "bf_x")
+    bot.add_user(y, "bf_y", referrer_id=x)
+    bot.process_referral(y, x)
+    # A database from before the migration: z is recorded in users.referrer_id only
+    bot.add_user(z, "bf_z", referrer_id=x)
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM counters WHERE name = 'referrals_backfilled'")
+        conn.commit()
+    bot.init_db()
+    assert edge(bot, z) == (x,)
+    # The backfilled edge counts as already paid
+    assert bot.process_referral(z, x) == []
+
+    # Once the marker is set, later starts don't rescan users
+    bot.add_user(w, "bf_w", referrer_id=x)
+    bot.init_db()
+    assert edge(bot, w) is None
+    with bot.db_connection() as conn:
+        assert conn.execute("SELECT value FROM counters WHERE name = 'referrals_backfilled'").fetchone() == (1,)
+
+
+def test_leaderboard_counts_direct_referrals(bot):
+    top_id, other = 8401, 8402
+    bot.add_user(top_id, "lb_top")
+    bot.add_user(other, "lb_other")
+    for i, referrer in enumerate([top_id] * 40 + [other] * 2):
+        uid = 8410 + i
+        bot.add_user(uid, None, referrer_id=referrer)
+        bot.process_referral(uid, referrer)
+    rows = {uid: (name, n) for uid, name, n in bot.referral_leaderboard(limit=1000)}
+    assert rows[top_id][1] == 40 and rows[other][1] == 2
+    # Usernames come back encrypted
+    assert bot.decrypt_data(rows[top_id][0]) == "lb_top"
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def stats(bot):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM user_daily_counts")
+        conn.commit()
+    return bot
+
+
+def test_add_user_counts_only_new_users(stats):
+    stats.add_user(1, "a")
+    stats.add_user(2, "b")
+    stats.add_user(1, "a")  # already there: INSERT OR IGNORE, no count
+    result = stats.get_stats()
+    assert result["total_users"] == 2
+    assert list(result["growth"].values()) == [2]
+
+
+def test_backfill_matches_join_dates_and_buckets(stats):
+    days = ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-09", "2024-02-01"]
+    with stats.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, join_date, activity_level) VALUES (?, ?, ?)",
+            [(i, f"{day}T12:00:00", i % 2) for i, day in enumerate(days)],
+        )
+        conn.commit()
+    stats.init_db()
+    stats.init_db()  # the backfill only runs into an empty table
+    assert stats.get_stats()["growth"] == {"2024-01-01": 2, "2024-01-02": 1, "2024-01-09": 1, "2024-02-01": 1}
+    assert stats.get_stats("month")["growth"] == {"2024-01": 4, "2024-02": 1}
+    assert stats.get_stats("day", window=2)["growth"] == {"2024-01-09": 1, "2024-02-01": 1}
+    result = stats.get_stats()
+    assert (result["total_users"], result["active_users"]) == (5, 2)
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+
+class FakeMember:
+    def __init__(self, status):
+        self.status = status
+
+
+class FakeBot:
+    """get_chat_member with a fixed latency; records calls and peak concurrency."""
+
+    def __init__(self, statuses=None, latency=0.0):
+        self.statuses = statuses or {}
+        self.latency = latency
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def get_chat_member(self, chat_id, user_id):
+        self.calls.append((chat_id, user_id))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            status = self.statuses.get(chat_id, "member")
+            if isinstance(status, Exception):
+                raise status
+            return FakeMember(status)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def subs(bot, monkeypatch):
+    monkeypatch.setattr(bot, "subscription_cache", bot.SubscriptionCache())
+    return bot
+
+
+def test_checks_run_concurrently_up_to_the_limit(subs):
+    channels = [f"@c{i}" for i in range(25)]
+    fake = FakeBot({"@c3": "left", "@c7": RuntimeError("chat not found")}, latency=0.01)
+    results = asyncio.run(subs.check_subscriptions(1, channels, fake))
+    assert list(results) == channels
+    assert [ch for ch, ok in results.items() if not ok] == ["@c3", "@c7"]
+    assert fake.peak == subs.SUBSCRIPTION_CHECK_CONCURRENCY
+
+
+def test_cached_results_skip_the_api(subs):
+    fake = FakeBot()
+    asyncio.run(subs.check_subscriptions(1, ["@a", "@B"], fake))
+    asyncio.run(subs.check_subscriptions(1, ["@a", "@b"], fake))
+    assert len(fake.calls) == 2
+    asyncio.run(subs.check_subscriptions(2, ["@a"], fake))
+    assert len(fake.calls) == 3
+
+
+def test_negative_results_expire_sooner(subs, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(subs.time, "monotonic", lambda: now[0])
+    fake = FakeBot({"@no": "left"})
+    asyncio.run(subs.check_subscriptions(1, ["@yes", "@no"], fake))
+    now[0] += subs.SUBSCRIPTION_NEGATIVE_TTL + 1
+    asyncio.run(subs.check_subscriptions(1, ["@yes", "@no"], fake))
+    assert [ch for ch, _ in fake.calls] == ["@yes", "@no", "@no"]
+    now[0] += subs.SUBSCRIPTION_CACHE_TTL
+    asyncio.run(subs.check_subscriptions(1, ["@yes"], fake))
+    assert [ch for ch, _ in fake.calls][-1] == "@yes"
+
+
+def test_invalidate_forces_a_fresh_check(subs):
+    fake = FakeBot({"@chan": "left"})
+    assert asyncio.run(subs.check_subscriptions(1, ["@chan"], fake)) == {"@chan": False}
+    fake.statuses["@chan"] = "member"
+    subs.subscription_cache.invalidate(1, "@CHAN")
+    assert asyncio.run(subs.check_subscriptions(1, ["@chan"], fake)) == {"@chan": True}
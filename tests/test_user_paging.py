@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture
+def users(bot):
+    with bot.db_connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.commit()
+    for uid in range(1, 26):
+        bot.add_user(uid, f"user{uid}", phone=f"+998{uid:09d}", country="UZ" if uid % 2 else "KZ")
+    return bot
+
+
+def ids(page):
+    return [row[0] for row in page[0]]
+
+
+def test_pages_forward_and_back(users):
+    first = users.list_users_page(limit=10)
+    assert ids(first) == list(range(1, 11)) and first[1:] == (False, True)
+    assert first[0][0][1:3] == ("user1", "+998000000001")
+    second = users.list_users_page(after_id=10, limit=10)
+    assert ids(second) == list(range(11, 21)) and second[1:] == (True, True)
+    last = users.list_users_page(after_id=20, limit=10)
+    assert ids(last) == list(range(21, 26)) and last[1:] == (True, False)
+    back = users.list_users_page(before_id=21, limit=10)
+    assert ids(back) == ids(second) and back[1:] == (True, True)
+    assert users.list_users_page(before_id=11, limit=10)[1:] == (False, True)
+
+
+def test_filters_apply_to_the_page_and_its_neighbours(users):
+    page = users.list_users_page(limit=5, country="KZ")
+    assert ids(page) == [2, 4, 6, 8, 10] and page[1:] == (False, True)
+    page = users.list_users_page(after_id=20, limit=5, country="KZ")
+    assert ids(page) == [22, 24] and page[1:] == (True, False)
+    assert users.list_users_page(country="RU") == ([], False, False)
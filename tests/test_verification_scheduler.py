@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+
+def run_scheduler(bot500, setup, wait=0.3, **kwargs):
+    fired = []
+
+    async def on_expire(user_ids):
+        fired.append(sorted(user_ids))
+
+    async def scenario():
+        scheduler = bot500.VerificationScheduler(on_expire, **kwargs)
+        scheduler.start()
+        setup(scheduler, time.time())
+        await asyncio.sleep(wait)
+        await scheduler.stop()
+        return scheduler
+
+    return fired, asyncio.run(scenario())
+
+
+def test_due_users_fire_together(bot500):
+    def setup(s, now):
+        for uid in range(1, 6):
+            s.schedule(uid, now + 0.05)
+        s.schedule(99, now + 60)
+
+    fired, scheduler = run_scheduler(bot500, setup)
+    assert fired == [[1, 2, 3, 4, 5]]
+    assert len(scheduler) == 1  # 99 still pending
+
+
+def test_cancel_and_reschedule(bot500):
+    def setup(s, now):
+        s.schedule(1, now + 0.05)
+        s.schedule(2, now + 0.05)
+        s.schedule(3, now + 0.05)
+        s.cancel(2)  # verified in time
+        s.schedule(3, now + 60)  # deadline moved: the old heap entry is stale
+
+    fired, scheduler = run_scheduler(bot500, setup)
+    assert fired == [[1]]
+    assert len(scheduler) == 1
+
+
+def test_earlier_deadline_wakes_the_scheduler(bot500):
+    def setup(s, now):
+        s.schedule(1, now + 60)
+        s.schedule(2, now + 0.05)
+
+    fired, _ = run_scheduler(bot500, setup)
+    assert fired == [[2]]
+
+
+def test_large_expiry_is_split_into_batches(bot500):
+    def setup(s, now):
+        for uid in range(2500):
+            s.schedule(uid, now)
+
+    fired, _ = run_scheduler(bot500, setup, wait=0.1, max_batch=1000)
+    assert [len(batch) for batch in fired] == [1000, 1000, 500]